@@ -0,0 +1,256 @@
+# benchmark.py
+
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+
+from fuzzy_match import fuzzy_match, levenshtein_distance, levenshtein_within, PlateIndex
+from plate_table import PlateTable
+from plate_store import PlateStore
+
+
+def random_plate(rng: random.Random) -> str:
+    """
+    Generate a plate shaped like a Polish one: 2-3 letter prefix + 4-5 symbols.
+    """
+    prefix = ''.join(rng.choice(string.ascii_uppercase) for _ in range(rng.choice((2, 3))))
+    suffix = ''.join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(rng.choice((4, 5))))
+    return prefix + suffix
+
+
+def ocr_noise(plate: str, rng: random.Random, edits: int) -> str:
+    """
+    Apply `edits` random substitutions/insertions/deletions to mimic OCR errors.
+    """
+    chars = list(plate)
+    alphabet = string.ascii_uppercase + string.digits
+    for _ in range(edits):
+        op = rng.choice(('sub', 'ins', 'del'))
+        pos = rng.randrange(len(chars)) if chars else 0
+        if op == 'sub' and chars:
+            chars[pos] = rng.choice(alphabet)
+        elif op == 'ins':
+            chars.insert(pos, rng.choice(alphabet))
+        elif chars:
+            del chars[pos]
+    return ''.join(chars)
+
+
+def make_queries(plates, rng: random.Random, count: int):
+    """
+    Half of the queries are noisy reads of known plates, half are strangers.
+    """
+    plates = list(plates)
+    queries = []
+    for i in range(count):
+        if i % 2 == 0:
+            queries.append(ocr_noise(rng.choice(plates), rng, rng.randint(0, 2)))
+        else:
+            queries.append(random_plate(rng))
+    return queries
+
+
+def bench_plate_index(sizes, tolerances, query_count, seed):
+    rng = random.Random(seed)
+    for size in sizes:
+        plates = set()
+        while len(plates) < size:
+            plates.add(random_plate(rng))
+        queries = make_queries(plates, rng, query_count)
+
+        start = time.perf_counter()
+        index = PlateIndex(plates)
+        build_time = time.perf_counter() - start
+        print(f"{size:>7} plates: index build {build_time:.2f}s")
+
+        for tolerance in tolerances:
+            start = time.perf_counter()
+            linear = [fuzzy_match(q, plates, tolerance) for q in queries]
+            linear_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            indexed = [fuzzy_match(q, index, tolerance) for q in queries]
+            index_time = time.perf_counter() - start
+
+            if linear != indexed:
+                raise AssertionError(f"PlateIndex disagrees with linear scan (size={size}, k={tolerance})")
+
+            print(f"    k={tolerance}: linear {linear_time * 1000 / query_count:8.2f} ms/query, "
+                  f"index {index_time * 1000 / query_count:8.2f} ms/query, "
+                  f"speedup x{linear_time / max(index_time, 1e-9):.1f}")
+
+
+def bench_kernel(pair_count, tolerances, seed):
+    """
+    Check `levenshtein_within` against the reference `levenshtein_distance`
+    on random plate pairs, then time both kernels.
+    """
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(pair_count):
+        plate = random_plate(rng)
+        other = ocr_noise(plate, rng, rng.randint(0, 3)) if i % 2 == 0 else random_plate(rng)
+        pairs.append((plate, other))
+
+    for a, b in pairs:
+        reference = levenshtein_distance(a, b)
+        for tolerance in range(0, 6):
+            expected = reference if reference <= tolerance else tolerance + 1
+            if levenshtein_within(a, b, tolerance) != expected:
+                raise AssertionError(f"levenshtein_within({a!r}, {b!r}, {tolerance}) != {expected}")
+    print(f"{pair_count} pairs: levenshtein_within agrees with levenshtein_distance for k=0..5")
+
+    start = time.perf_counter()
+    for a, b in pairs:
+        levenshtein_distance(a, b)
+    full_time = time.perf_counter() - start
+    print(f"    full DP:  {full_time * 1e6 / pair_count:6.2f} us/pair")
+
+    for tolerance in tolerances:
+        start = time.perf_counter()
+        for a, b in pairs:
+            levenshtein_within(a, b, tolerance)
+        bounded_time = time.perf_counter() - start
+        print(f"    k={tolerance}:      {bounded_time * 1e6 / pair_count:6.2f} us/pair, "
+              f"speedup x{full_time / max(bounded_time, 1e-9):.1f}")
+
+
+def bench_plate_table(sizes, tolerance, boxes, seed):
+    """
+    Match one frame's worth of hypotheses (3 engines per box) against the
+    database: per-read fuzzy_match scans vs. a single PlateTable batch.
+    """
+    rng = random.Random(seed)
+    for size in sizes:
+        plates = set()
+        while len(plates) < size:
+            plates.add(random_plate(rng))
+        queries = make_queries(plates, rng, boxes * 3)
+
+        start = time.perf_counter()
+        table = PlateTable(plates)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        linear = [fuzzy_match(q, plates, tolerance) for q in queries]
+        linear_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = [plate for plate, _ in table.match_batch(queries, tolerance)]
+        batch_time = time.perf_counter() - start
+
+        if linear != batched:
+            raise AssertionError(f"PlateTable disagrees with fuzzy_match (size={size})")
+
+        print(f"{size:>7} plates, {len(queries)} reads: table build {build_time * 1000:.0f} ms, "
+              f"linear {linear_time * 1000:.1f} ms/frame, batch {batch_time * 1000:.1f} ms/frame, "
+              f"speedup x{linear_time / max(batch_time, 1e-9):.1f}")
+
+
+def bench_plate_store(sizes, changes, seed):
+    """
+    Persist `changes` single-plate adds/removes and load the result: full
+    sorted rewrite per change vs. PlateStore journal appends plus replay.
+    """
+    rng = random.Random(seed)
+    for size in sizes:
+        plates = set()
+        while len(plates) < size:
+            plates.add(random_plate(rng))
+        edits = [(rng.random() < 0.5, random_plate(rng)) for _ in range(changes)]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'plates.txt')
+
+            # Old behaviour: rewrite the whole file on every change
+            entries = set(plates)
+            start = time.perf_counter()
+            for add, plate in edits:
+                if add:
+                    entries.add(plate)
+                else:
+                    entries.discard(plate)
+                with open(path, 'w', encoding='utf-8') as f:
+                    for p in sorted(entries):
+                        f.write(p + "\n")
+            rewrite_time = (time.perf_counter() - start) / changes
+            start = time.perf_counter()
+            with open(path, 'r', encoding='utf-8') as f:
+                loaded = {line.strip() for line in f if line.strip()}
+            rewrite_load_time = time.perf_counter() - start
+            expected = loaded
+            os.unlink(path)
+
+            # Journal: snapshot once, then one append per change
+            store = PlateStore(path, compact_every=changes + 1)
+            store.compact(plates)
+            entries = set(plates)
+            start = time.perf_counter()
+            for add, plate in edits:
+                if add:
+                    entries.add(plate)
+                    store.record_add([plate])
+                else:
+                    entries.discard(plate)
+                    store.record_remove([plate])
+            append_time = (time.perf_counter() - start) / changes
+            store.close()
+
+            start = time.perf_counter()
+            loaded = PlateStore(path, compact_every=changes + 1).load()
+            replay_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            store.compact(loaded)
+            compact_time = time.perf_counter() - start
+
+        if loaded != expected:
+            raise AssertionError(f"PlateStore replay disagrees with a full rewrite (size={size})")
+
+        print(f"{size:>7} plates, {changes} changes: rewrite {rewrite_time * 1000:.2f} ms/change, "
+              f"load {rewrite_load_time * 1000:.0f} ms | journal {append_time * 1000:.2f} ms/change, "
+              f"load + replay {replay_time * 1000:.0f} ms, compaction {compact_time * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AntyTajniak micro-benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    index_parser = subparsers.add_parser('index', help="PlateIndex vs. linear fuzzy_match scan")
+    index_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    index_parser.add_argument('--tolerances', type=int, nargs='+', default=[1, 2, 3])
+    index_parser.add_argument('--queries', type=int, default=50)
+    index_parser.add_argument('--seed', type=int, default=0)
+
+    kernel_parser = subparsers.add_parser('kernel', help="levenshtein_within vs. full-table levenshtein_distance")
+    kernel_parser.add_argument('--pairs', type=int, default=20000)
+    kernel_parser.add_argument('--tolerances', type=int, nargs='+', default=[0, 1, 2, 5])
+    kernel_parser.add_argument('--seed', type=int, default=0)
+
+    batch_parser = subparsers.add_parser('batch', help="PlateTable batch matching vs. per-read fuzzy_match")
+    batch_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    batch_parser.add_argument('--tolerance', type=int, default=1)
+    batch_parser.add_argument('--boxes', type=int, default=3)
+    batch_parser.add_argument('--seed', type=int, default=0)
+
+    store_parser = subparsers.add_parser('store', help="PlateStore journal vs. full rewrite per change")
+    store_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 300000])
+    store_parser.add_argument('--changes', type=int, default=200)
+    store_parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == 'index':
+        bench_plate_index(args.sizes, args.tolerances, args.queries, args.seed)
+    elif args.command == 'kernel':
+        bench_kernel(args.pairs, args.tolerances, args.seed)
+    elif args.command == 'batch':
+        bench_plate_table(args.sizes, args.tolerance, args.boxes, args.seed)
+    elif args.command == 'store':
+        bench_plate_store(args.sizes, args.changes, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,90 @@
 # database_manager.py
 
+import argparse
+import bisect
+import csv
 import os
 import re
+import threading
+
+from fuzzy_match import PlateIndex, MatchCache, MAX_DELETES
+from plate_table import PlateTable
+from plate_store import PlateStore
 
 # Adjust the path as needed. Here we assume database file is in the same directory.
 database_path = os.path.join(os.path.dirname(__file__), 'license_plate_database.txt')
 
-# A global set that holds all known database entries
-database_entries = set()
+# The database file is the snapshot; changes since then are in its journal
+plate_store = PlateStore(database_path)
+
+
+class DatabaseSnapshot:
+    """
+    One immutable version of the plate database together with its lookup
+    structures: `plates` (frozenset), `index` (PlateIndex for fuzzy and
+    exact lookups), `table` (PlateTable for batch matching a whole frame)
+    and `generation`, which keys match_cache.
+
+    Snapshots are never modified. Writers publish a new one, readers take
+    the current one with `snapshot()` and can use it without locking for
+    as long as they like. A snapshot published without an index (index=None)
+    builds it in the background with `build_index`; until it is ready,
+    matching uses the table.
+    """
+
+    def __init__(self, plates, index, table, generation):
+        self.plates = plates
+        self.table = table
+        self.generation = generation
+        self._index = index
+        self._index_lock = threading.Lock()
+
+    @property
+    def index(self) -> PlateIndex:
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    self._index = PlateIndex(self.plates)
+        return self._index
+
+    @property
+    def index_ready(self) -> bool:
+        return self._index is not None
 
-# Load the database on module import
-if not os.path.exists(database_path):
-    open(database_path, 'w', encoding='utf-8').close()
+    def build_index(self):
+        """
+        Build the index on a background thread unless it already exists.
+        """
+        if self._index is None:
+            threading.Thread(target=lambda: self.index, name='plate-index', daemon=True).start()
 
-with open(database_path, 'r', encoding='utf-8') as f:
-    # Each line is one plate
-    database_entries = {line.strip() for line in f if line.strip()}
+    def __contains__(self, plate):
+        return plate in self.plates
+
+    def __len__(self):
+        return len(self.plates)
+
+    def __iter__(self):
+        return iter(self.plates)
+
+
+# Loaded on module import
+_plates = frozenset(plate_store.load())
+_snapshot = DatabaseSnapshot(_plates, None, PlateTable(_plates), 0)
+_snapshot.build_index()
+
+# Serializes writers; readers never take it
+write_lock = threading.Lock()
+
+# Results of recent lookups, so a plate that stays in view is matched once
+match_cache = MatchCache()
+
+
+def snapshot() -> DatabaseSnapshot:
+    """
+    Return the current database snapshot.
+    """
+    return _snapshot
 
 
 def normalize_plate(text: str) -> str:
@@ -24,42 +93,252 @@ def normalize_plate(text: str) -> str:
     return text
 
 
+def apply_changes(added=(), removed=()) -> DatabaseSnapshot:
+    """
+    Add and remove plates, journal the change and publish the resulting
+    snapshot. Returns the snapshot now current.
+    """
+    global _snapshot
+    with write_lock:
+        current = _snapshot
+        added = {plate for plate in added if plate not in current.plates}
+        removed = {plate for plate in removed if plate in current.plates} - added
+        if not added and not removed:
+            return current
+
+        plates = (current.plates | added) - removed
+        # An index still being built is started over for the new snapshot
+        index = current._index.with_changes(added, removed) if current._index is not None else None
+        new_snapshot = DatabaseSnapshot(plates, index, current.table.with_changes(added, removed),
+                                        current.generation + 1)
+
+        if len(added) + len(removed) >= plate_store.compact_every:
+            # Bulk change: one snapshot write instead of a long journal
+            plate_store.compact(plates)
+        else:
+            if added:
+                plate_store.record_add(sorted(added))
+            if removed:
+                plate_store.record_remove(sorted(removed))
+            if plate_store.needs_compaction():
+                plate_store.compact(plates)
+
+        # A single reference assignment: readers see the old or the new
+        # snapshot, never a mix
+        _snapshot = new_snapshot
+        new_snapshot.build_index()
+        return new_snapshot
+
+
+def match_hypotheses(texts, mismatch_tolerance: int, database: DatabaseSnapshot = None):
+    """
+    Return the matching plate (or None) for each text in `database` (by
+    default the current snapshot), using match_cache. Cache misses are
+    looked up in its index when the tolerance is within the index's
+    deletion depth, otherwise (or while the index is still being built)
+    sent to its table in one batch.
+    """
+    if database is None:
+        database = snapshot()
+
+    results = [None] * len(texts)
+    missing = []
+    for i, text in enumerate(texts):
+        found, plate = match_cache.get(text, mismatch_tolerance, database.generation)
+        if found:
+            results[i] = plate
+        else:
+            missing.append(i)
+
+    if missing:
+        queries = [texts[i] for i in missing]
+        if mismatch_tolerance <= MAX_DELETES and database.index_ready:
+            matches = [database.index.nearest(query.strip().upper(), mismatch_tolerance)
+                       if query.strip() else (None, None) for query in queries]
+        else:
+            matches = database.table.match_batch(queries, mismatch_tolerance)
+        for i, (plate, _) in zip(missing, matches):
+            results[i] = plate
+            match_cache.put(texts[i], mismatch_tolerance, database.generation, plate)
+    return results
+
+
+# Accepted plate length after normalize_plate; anything else is rejected
+MIN_PLATE_LENGTH = 2
+MAX_PLATE_LENGTH = 10
+
+# CSV header names of the plate column (after normalize_plate)
+PLATE_COLUMNS = ('PLATE', 'PLATES', 'TABLICA', 'NUMER', 'REJESTRACJA')
+
+
+def iter_plate_file(path: str):
+    """
+    Yield the raw plate entries of a text file (one per line) or a CSV file
+    (the column named like PLATE_COLUMNS, otherwise the first one) without
+    reading the whole file into memory.
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if not path.lower().endswith('.csv'):
+            for line in f:
+                yield line
+            return
+
+        reader = csv.reader(f)
+        column = 0
+        for row_number, row in enumerate(reader):
+            if row_number == 0:
+                header = [normalize_plate(cell) for cell in row]
+                named = [i for i, name in enumerate(header) if name in PLATE_COLUMNS]
+                if named:
+                    column = named[0]
+                    continue
+            yield row[column] if column < len(row) else ''
+
+
+def import_plates(paths):
+    """
+    Add the plates from the given text/CSV files as a single change (one
+    persistence write, one index update). Returns [(path, counts), ...]
+    where counts has 'accepted', 'duplicate' (already in the database or
+    earlier in the import) and 'rejected' (not a plate after normalize_plate).
+    Blank lines are skipped.
+    """
+    database = snapshot()
+    new_plates = set()
+    report = []
+    for path in paths:
+        counts = {'accepted': 0, 'duplicate': 0, 'rejected': 0}
+        for entry in iter_plate_file(path):
+            if not entry.strip():
+                continue
+            plate = normalize_plate(entry)
+            if not MIN_PLATE_LENGTH <= len(plate) <= MAX_PLATE_LENGTH:
+                counts['rejected'] += 1
+            elif plate in database or plate in new_plates:
+                counts['duplicate'] += 1
+            else:
+                new_plates.add(plate)
+                counts['accepted'] += 1
+        report.append((path, counts))
+
+    apply_changes(added=new_plates)
+    return report
+
+
+def export_plates(path: str) -> int:
+    """
+    Write the current database to a text file (one plate per line) or, for
+    a .csv path, a CSV file with a 'plate' header. Returns the plate count.
+    """
+    plates = sorted(snapshot().plates)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            writer = csv.writer(f)
+            writer.writerow(['plate'])
+            for plate in plates:
+                writer.writerow([plate])
+        else:
+            for plate in plates:
+                f.write(plate + "\n")
+    return len(plates)
+
+
 def save_database():
-    with open(database_path, 'w', encoding='utf-8') as f:
-        for plate in sorted(database_entries):
-            f.write(plate + "\n")
+    """
+    Write the whole database as a new snapshot and empty the journal.
+    """
+    with write_lock:
+        plate_store.compact(_snapshot.plates)
+
+
+# Highest tolerance used by search_plates; up to this the plate index
+# answers without a linear scan
+MAX_SEARCH_TOLERANCE = MAX_DELETES
+
+
+def search_plates(query: str, mismatch_tolerance: int, limit: int = 500, database: DatabaseSnapshot = None):
+    """
+    Return the plates starting with the normalized `query`, then the other
+    plates within `mismatch_tolerance` (at most MAX_SEARCH_TOLERANCE) edits
+    of it, closest first, at most `limit` in total. An empty query returns
+    the whole sorted database.
+    """
+    if database is None:
+        database = snapshot()
+    plates = database.table.plates
+    query = normalize_plate(query)
+    if not query:
+        return plates
 
+    # The table keeps the plates sorted, so the prefix matches are one run
+    start = bisect.bisect_left(plates, query)
+    found = []
+    for plate in plates[start:start + limit]:
+        if not plate.startswith(query):
+            break
+        found.append(plate)
+    # A query still too short to be within tolerance of any plate skips
+    # the fuzzy pass
+    mismatch_tolerance = min(mismatch_tolerance, MAX_SEARCH_TOLERANCE)
+    if len(found) < limit and len(plates) and len(query) + mismatch_tolerance >= database.table.lengths.min():
+        fuzzy = [plate for plate, _ in database.index.within(query, mismatch_tolerance)
+                 if not plate.startswith(query)]
+        found.extend(fuzzy[:limit - len(found)])
+    return found
 
-def refresh_database_list(listbox):
+
+def refresh_database_list(plate_list, query: str = '', mismatch_tolerance: int = 1):
     """
-    Clear and repopulate the Tkinter listbox with the current `database_entries`.
+    Show the current database in `plate_list` (a VirtualList), filtered by
+    `query` as in search_plates.
     """
-    listbox.delete(0, "end")
-    for plate in sorted(database_entries):
-        listbox.insert("end", plate)
+    plate_list.set_items(search_plates(query, mismatch_tolerance))
 
 
-def add_plate_entry(entry_widget, listbox):
+def add_plate_entry(entry_widget, plate_list, refresh=refresh_database_list):
     """
-    Add a new plate from the entry widget to the database and refresh the listbox.
+    Add a new plate from the entry widget to the database and refresh the list.
     """
     new_plate = entry_widget.get().strip()
     new_plate = normalize_plate(new_plate)
-    if new_plate and new_plate not in database_entries:
-        database_entries.add(new_plate)
-        save_database()
-        refresh_database_list(listbox)
+    if new_plate and new_plate not in snapshot():
+        apply_changes(added=[new_plate])
+        refresh(plate_list)
         entry_widget.delete(0, "end")
 
 
-def remove_selected_plate(listbox):
+def remove_selected_plate(plate_list, refresh=refresh_database_list):
     """
-    Remove the currently selected plate in the listbox from the database.
+    Remove the currently selected plate in the list from the database.
     """
-    selection = listbox.curselection()
+    selection = plate_list.curselection()
     if selection:
-        plate_to_remove = listbox.get(selection[0])
-        if plate_to_remove in database_entries:
-            database_entries.remove(plate_to_remove)
-            save_database()
-            refresh_database_list(listbox)
+        plate_to_remove = plate_list.get(selection[0])
+        if plate_to_remove in snapshot():
+            apply_changes(removed=[plate_to_remove])
+            refresh(plate_list)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import or export the plate database")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help="add plates from text/CSV files")
+    import_parser.add_argument('files', nargs='+')
+
+    export_parser = subparsers.add_parser('export', help="write all plates to a text/CSV file")
+    export_parser.add_argument('file')
+
+    args = parser.parse_args()
+    if args.command == 'import':
+        for path, counts in import_plates(args.files):
+            print(f"{path}: {counts['accepted']} accepted, {counts['duplicate']} duplicate, "
+                  f"{counts['rejected']} rejected")
+        print(f"database: {len(snapshot())} plates")
+    elif args.command == 'export':
+        count = export_plates(args.file)
+        print(f"{args.file}: {count} plates exported")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# depth_sampling.py
+
+import numpy as np
+import pyrealsense2 as rs
+
+# Search range (meters) when looking for a color pixel along the depth epipolar line
+DEPTH_MIN = 0.1
+DEPTH_MAX = 20.0
+
+
+class DepthProjector:
+    """
+    Reads the distance of a color-image region straight from the raw,
+    unaligned depth frame.
+
+    Instead of aligning the whole depth image to the color stream on every
+    frame, only the corners of the plate bounding box are projected into
+    depth-image coordinates (using the stream intrinsics and extrinsics),
+    and the median of the valid depth pixels inside that region is returned.
+    """
+
+    def __init__(self, profile):
+        color_profile = profile.get_stream(rs.stream.color).as_video_stream_profile()
+        depth_profile = profile.get_stream(rs.stream.depth).as_video_stream_profile()
+        self.color_intrinsics = color_profile.get_intrinsics()
+        self.depth_intrinsics = depth_profile.get_intrinsics()
+        self.color_to_depth = color_profile.get_extrinsics_to(depth_profile)
+        self.depth_to_color = depth_profile.get_extrinsics_to(color_profile)
+        self.depth_scale = profile.get_device().first_depth_sensor().get_depth_scale()
+
+    def _to_depth_pixel(self, depth_frame, x, y):
+        return rs.rs2_project_color_pixel_to_depth_pixel(
+            depth_frame.get_data(), self.depth_scale, DEPTH_MIN, DEPTH_MAX,
+            self.depth_intrinsics, self.color_intrinsics,
+            self.depth_to_color, self.color_to_depth, [float(x), float(y)])
+
+    def region_distance(self, depth_frame, bbox) -> float:
+        """
+        Median distance in meters of the color-image box (x1, y1, x2, y2),
+        or 0.0 when the region has no valid depth (like get_distance).
+        """
+        x1, y1, x2, y2 = bbox
+        dx1, dy1 = self._to_depth_pixel(depth_frame, x1, y1)
+        dx2, dy2 = self._to_depth_pixel(depth_frame, x2, y2)
+
+        width, height = self.depth_intrinsics.width, self.depth_intrinsics.height
+        left = int(max(0, min(dx1, dx2)))
+        right = int(min(width, max(dx1, dx2) + 1))
+        top = int(max(0, min(dy1, dy2)))
+        bottom = int(min(height, max(dy1, dy2) + 1))
+        if left >= right or top >= bottom:
+            return 0.0
+
+        depth_image = np.asanyarray(depth_frame.get_data())
+        region = depth_image[top:bottom, left:right]
+        valid = region[region > 0]
+        if valid.size == 0:
+            return 0.0
+        return float(np.median(valid)) * self.depth_scale
@@ -7,68 +7,285 @@ import time
 import queue
 import threading
 import re
+import logging
 
 import pyrealsense2 as rs
-import pytesseract
-import easyocr
-from paddleocr import PaddleOCR
-from ultralytics import YOLO
 
-from fuzzy_match import fuzzy_match
-from database_manager import database_entries
-from settings_manager import load_settings
+import database_manager
+from settings_manager import settings_store
+from model_registry import ModelRegistry
+from ocr_manager_async import OcrExecutor, cascade_policy
+from plate_tracker import PlateTracker
+from motion_gate import MotionGate
+from inference_service import InferenceService
+from stage_queue import StageQueue, LatencyStats
+from depth_sampling import DepthProjector
+from frame_pool import FramePool
+from preview_buffer import PreviewBuffer
 
-import ocr_manager_async
+logger = logging.getLogger(__name__)
 
 detection_queue = queue.Queue()
 running = True
 
+# Called from the detection threads after each event is put on
+# detection_queue (e.g. to wake the UI); must return quickly
+detection_listeners = []
+
+
+def post_event(item):
+    detection_queue.put(item)
+    for listener in detection_listeners:
+        listener()
+
+
 # --- DEBUG MODE GLOBALS ---
 front_debug_mode = False
 back_debug_mode = False
 front_debug_image = None   # Numpy array for front camera override
 back_debug_image = None    # Numpy array for back camera override
 
-# Keep track of each camera’s *current* frame to show mini-previews in the UI
-front_last_frame = None
-back_last_frame = None
 # --------------------------
 
+# Per-camera frame buffers; each camera publishes its latest frame and
+# results there for the DetectionViewer
+frame_pools = {}
+
+# Per-camera downscaled RGB previews for the UI mini-previews
+previews = {}
+
+# Buffers made up front per camera: enough for every frame in flight
+# between the stages plus the published one
+FRAME_POOL_SIZE = 12
+
 ALERT_COOLDOWN = 120.0
 last_alert_time = 0.0
 
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-tesseract_config = r'--oem 3 --psm 7 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+# OCR engine calls made / skipped by the cascade, for the Debug screen
+ocr_engine_calls = {'run': 0, 'saved': 0}
+
+# Per-camera motion gates in front of YOLO, for the Debug screen
+motion_gates = {}
+
+# Per-camera end-to-end frame latency and stage queues, for the Debug screen
+pipeline_stats = {}
+
+# Samples kept by each latency window; replay.py raises it to cover a whole run
+LATENCY_WINDOW = 300
+
+# Time spent per step across all cameras ('yolo', 'ocr <engine>', 'fuzzy match',
+# 'depth'), as LatencyStats
+stage_timings = {}
+stage_timings_lock = threading.Lock()
+
+
+def record_timing(name: str, seconds: float):
+    stats = stage_timings.get(name)
+    if stats is None:
+        with stage_timings_lock:
+            stats = stage_timings.setdefault(name, LatencyStats(LATENCY_WINDOW))
+    stats.add(seconds)
+
+PLATE_MODEL_PATH = "D:\\Users\\admin-5\\Desktop\\license_plate_detector.pt"
 
-easyocr_reader = easyocr.Reader(['en'])
-paddleocr_reader = PaddleOCR(lang='en', use_angle_cls=True)
 
-# Load your YOLO plate model
-plate_model = YOLO("D:\\Users\\admin-5\\Desktop\\license_plate_detector.pt")
+def load_plate_model():
+    # Imported here: ultralytics is a large part of the startup cost
+    from ultralytics import YOLO
+    return YOLO(PLATE_MODEL_PATH)
+
+
+# Models are built in the background (see main.py) or on first use
+models = ModelRegistry()
+models.register('yolo', load_plate_model)
+
+# The YOLO model is shared by all cameras through one batching service
+inference_service = InferenceService(models)
+
+# OCR engines run concurrently on their own worker pools; their results
+# are tried against the database in this order
+ocr_executor = OcrExecutor(models)
+OCR_ENGINES = tuple(ocr_executor.model_names())
+
+CAMERA_FPS = 15
 
 FRONT_CAMERA_SERIAL = "112322077965"
 BACK_CAMERA_SERIAL = "109622072518"
 
 config_front = rs.config()
 config_front.enable_device(FRONT_CAMERA_SERIAL)
-config_front.enable_stream(rs.stream.color, 640, 480, rs.format.bgr8, 15)
-config_front.enable_stream(rs.stream.depth, 480, 270, rs.format.z16, 15)
+config_front.enable_stream(rs.stream.color, 640, 480, rs.format.bgr8, CAMERA_FPS)
+config_front.enable_stream(rs.stream.depth, 480, 270, rs.format.z16, CAMERA_FPS)
 
 config_back = rs.config()
 config_back.enable_device(BACK_CAMERA_SERIAL)
-config_back.enable_stream(rs.stream.color, 640, 480, rs.format.bgr8, 15)
-config_back.enable_stream(rs.stream.depth, 480, 270, rs.format.z16, 15)
+config_back.enable_stream(rs.stream.color, 640, 480, rs.format.bgr8, CAMERA_FPS)
+config_back.enable_stream(rs.stream.depth, 480, 270, rs.format.z16, CAMERA_FPS)
+
+
+def crop_quality(plate_gray) -> float:
+    """
+    Score a plate crop for OCR: larger and sharper (Laplacian variance) is better.
+    """
+    sharpness = cv2.Laplacian(plate_gray, cv2.CV_64F).var()
+    return plate_gray.shape[0] * plate_gray.shape[1] * sharpness
+
+
+def normalize_text(text):
+    text = text.upper()
+    text = re.sub(r'[^A-Z0-9]', '', text)
+    return text
 
 
-def run_detection(pipeline, orientation, config):
+def read_plate_crops(plate_crops, database, policy, mismatch_tolerance, use_consensus, orientation):
     """
+    OCR the plate crops (bbox, gray image, track, quality) that need it and
+    decide the matched plate for each against the `database` snapshot.
+    Returns a list of (crop, {engine name: normalized text}, matched plate or None).
+
+    With `use_consensus`, every read is added to the track's consensus and
+    only the settled consensus string is matched against the database;
+    the cascade then only needs exact database hits to stop early.
+    """
+    def exact_match(text):
+        text = normalize_text(text)
+        return text if text in database else None
+
+    def match_texts(texts):
+        if not texts:
+            return []
+        started = time.perf_counter()
+        matches = database_manager.match_hypotheses(texts, mismatch_tolerance, database)
+        record_timing('fuzzy match', time.perf_counter() - started)
+        return matches
+
+    def fuzzy_match_text(text):
+        return match_texts([normalize_text(text)])[0]
+
+    def record_engine_timings(results):
+        for result in results.values():
+            if result.status in ('ok', 'error', 'timeout'):
+                record_timing(f"ocr {result.engine}", result.elapsed)
+
+    # (crop, {engine name: OcrResult}, matched plate or None)
+    outcomes = []
+    if policy.run_all:
+        # Hand every crop to all engines first, so crops from all boxes are
+        # read concurrently, then collect the reads
+        submitted_reads = [(crop, ocr_executor.submit(crop[1])) for crop in plate_crops]
+        for crop, submitted in submitted_reads:
+            # Engines still warming up or over their timeout give ''
+            results = ocr_executor.collect(submitted)
+            record_engine_timings(results)
+            outcomes.append((crop, results, None))
+            ocr_engine_calls['run'] += sum(result.status != 'unavailable' for result in results.values())
+
+        if not use_consensus:
+            # One vectorized pass over the database for every engine and box,
+            # skipping texts already answered by the match cache
+            hypotheses = [normalize_text(result.text) for _, results, _ in outcomes for result in results.values()]
+            matches = iter(match_texts(hypotheses))
+            for n, (crop, results, _) in enumerate(outcomes):
+                box_matches = [next(matches) for _ in results]
+                # First engine (in results order) with a database hit wins
+                outcomes[n] = (crop, results, next((match for match in box_matches if match), None))
+    else:
+        calls_saved = 0
+        for crop in plate_crops:
+            results, plate_found = ocr_executor.cascade(
+                crop[1], exact_match if use_consensus else fuzzy_match_text, policy)
+            record_engine_timings(results)
+            outcomes.append((crop, results, plate_found))
+            calls_saved += sum(result.status == 'skipped' for result in results.values())
+            ocr_engine_calls['run'] += sum(result.status not in ('skipped', 'unavailable')
+                                           for result in results.values())
+        ocr_engine_calls['saved'] += calls_saved
+        if calls_saved:
+            logger.debug("%s: OCR cascade saved %d engine calls on %d plates",
+                         orientation, calls_saved, len(plate_crops))
+
+    if use_consensus:
+        settled = []
+        for n, (crop, results, _) in enumerate(outcomes):
+            plate_gray, track = crop[1], crop[2]
+            crop_area = plate_gray.shape[0] * plate_gray.shape[1]
+            for result in results.values():
+                if result.status == 'ok':
+                    track.consensus.add(normalize_text(result.text), result.confidence, crop_area)
+            consensus_text = track.consensus.settled()
+            if consensus_text:
+                settled.append((n, consensus_text))
+        # Plates without a settled consensus are not matched (and not
+        # alerted on) yet
+        matches = match_texts([text for _, text in settled])
+        plate_matches = {n: match for (n, _), match in zip(settled, matches)}
+        outcomes = [(crop, results, plate_matches.get(n)) for n, (crop, results, _) in enumerate(outcomes)]
+
+    return [(crop, {engine_name: normalize_text(result.text) for engine_name, result in results.items()},
+             plate_found)
+            for crop, results, plate_found in outcomes]
+
+
+class FramePacket:
+    """
+    One camera frame travelling through the detection stages.
+    """
+
+    def __init__(self, seq, color_image, depth_frame, depth_val, depth_aligned=False, frame=None):
+        self.seq = seq
+        self.captured_at = time.perf_counter()
+        self.color_image = color_image
+        # Pooled buffer holding color_image (None for debug images)
+        self.frame = frame
+        self.depth_frame = depth_frame
+        self.depth_val = depth_val
+        # True when depth_frame was aligned to the color image
+        self.depth_aligned = depth_aligned
+        self.plate_boxes = []
+        # (bbox, {engine name: normalized text}, matched plate or None)
+        self.plate_reads = []
+
+    def release(self):
+        """
+        Give the pooled frame back; call once the packet is dropped or done.
+        """
+        if self.frame is not None:
+            self.frame.release()
+            self.frame = None
+
+
+class DetectionResult:
+    """
+    What was found in one emitted frame, published along with the frame.
+    """
+
+    def __init__(self, seq, captured_at, plates):
+        self.seq = seq
+        self.captured_at = captured_at
+        # (bbox, {engine name: normalized text}, matched plate or None, distance in m)
+        self.plates = plates
+
+
+def run_detection(pipeline, orientation, config, source=None):
+    """
+    Run one camera as four stages on their own threads, joined by bounded
+    drop-oldest queues so a slow stage never holds up frame capture:
+
+        capture -> plate detection -> OCR and matching -> alert emission
+
     If debug_mode is True for a camera, use the debug_image in place of RealSense frames.
-    Also store the last displayed frame into front_last_frame/back_last_frame for UI previews.
+    Frames live in the camera's FramePool; the last emitted one is published there, with its
+    DetectionResult, for the DetectionViewer, and a small RGB copy goes to the camera's
+    PreviewBuffer for the UI. Nothing here draws or calls the GUI. Alert emission runs on
+    the calling thread.
+
+    With a `source` (see replay.py) frames are read from it instead of the camera, and the
+    run ends once it is exhausted and every frame read has been emitted. Unless the source
+    paces itself in real time, stages then wait for room instead of dropping frames.
     """
-    global running, last_alert_time
+    global running
     global front_debug_mode, back_debug_mode
     global front_debug_image, back_debug_image
-    global front_last_frame, back_last_frame
 
     # Decide which camera’s debug variables to use
     if orientation == "front":
@@ -78,166 +295,297 @@ def run_detection(pipeline, orientation, config):
         debug_mode = back_debug_mode
         debug_img_ref = lambda: back_debug_image
 
-    if not debug_mode:
-        align_to = rs.stream.color
-        align = rs.align(align_to)
-        pipeline.start(config)
-
-    text_window_name = f"Text Detection Feed ({orientation.title()})"
-    distance_window_name = f"Distance Detection Feed ({orientation.title()})"
-
-    def local_normalize_text(text):
-        text = text.upper()
-        text = re.sub(r'[^A-Z0-9]', '', text)
-        return text
-
-    try:
-        while running:
-            # If we’re in debug mode, we skip reading RealSense frames
-            if (orientation == "front" and front_debug_mode and front_debug_image is not None):
-                color_image = front_debug_image.copy()
+    # Start as soon as YOLO and at least one OCR engine are usable; the
+    # remaining engines join in once they finish loading
+    models.start_loading()
+    while running and not models.wait_for(['yolo'], any_of=OCR_ENGINES, timeout=0.5):
+        pass
+    if not running:
+        return
+    inference_service.register_camera(orientation)
+
+    align = None
+    depth_projector = None
+    if source is not None:
+        depth_projector = source.start()
+    elif not debug_mode:
+        profile = pipeline.start(config)
+        # Full-frame alignment is only kept for depth_mode 'align'
+        align = rs.align(rs.stream.color)
+        depth_projector = DepthProjector(profile)
+
+    # One tracker per camera, so OCR runs once per vehicle, not per frame
+    tracker = PlateTracker(consensus_min_reads=settings_store.get('consensus_min_reads', 3),
+                           consensus_min_agreement=settings_store.get('consensus_min_agreement', 0.6),
+                           consensus_max_attempts=settings_store.get('consensus_max_attempts', 10))
+
+    # Reuse the previous boxes while the picture does not change
+    motion_gate = MotionGate(**settings_store.get('motion_gate', {}).get(orientation, {}))
+    motion_gates[orientation] = motion_gate
+
+    def on_setting_changed(key, value):
+        if key == 'motion_gate':
+            motion_gate.configure(**value.get(orientation, {}))
+
+    settings_store.subscribe(on_setting_changed)
+
+    # Frames are copied once into pooled buffers and handed between stages
+    # by reference; a packet dropped by a queue gives its buffer back
+    frame_pool = FramePool()
+    frame_pool.preallocate((480, 640, 3), FRAME_POOL_SIZE)
+    frame_pools[orientation] = frame_pool
+
+    # Refreshed at most preview_fps times per second, on the emit thread
+    preview = PreviewBuffer(settings_store.get('preview_size', (160, 90)))
+    previews[orientation] = preview
+    last_preview = 0.0
+
+    # A replay at native speed must see every frame, so it waits instead
+    lossless = source is not None and not source.real_time
+
+    def hand_off(stage_queue, packet):
+        if lossless:
+            while active() and not stage_queue.wait_for_room(timeout=0.1):
+                pass
+        dropped = stage_queue.put(packet)
+        if dropped is not None:
+            dropped.release()
+
+    detect_queue = StageQueue(maxsize=1)
+    ocr_queue = StageQueue(maxsize=1)
+    emit_queue = StageQueue(maxsize=2)
+    latency = LatencyStats(LATENCY_WINDOW)
+    frame_counts = {'read': 0, 'emitted': 0}
+    pipeline_stats[orientation] = {
+        'latency': latency,
+        'queues': {'detect': detect_queue, 'ocr': ocr_queue, 'emit': emit_queue},
+        'frame_pool': frame_pool,
+        'frames': frame_counts
+    }
+
+    # Stops this camera's stages; the global `running` stops all cameras
+    stopped = threading.Event()
+    # Set once `source` has no more frames
+    source_done = threading.Event()
+    stage_errors = []
+
+    def active():
+        return running and not stopped.is_set()
+
+    def capture_stage():
+        seq = 0
+        while active():
+            depth_aligned = False
+            frame = None
+            if source is not None:
+                item = source.read()
+                if item is None:
+                    source_done.set()
+                    return
+                image, depth_frame, depth_val, depth_aligned = item
+                frame = frame_pool.copy_of(image)
+                color_image = frame.array
+            # If we’re in debug mode, we skip reading RealSense frames.
+            # The debug image is never drawn on, so it is used without a copy
+            elif (orientation == "front" and front_debug_mode and front_debug_image is not None):
+                color_image = front_debug_image
                 depth_frame = None
                 depth_val = 2.0  # fixed distance
+                time.sleep(1.0 / CAMERA_FPS)
             elif (orientation == "back" and back_debug_mode and back_debug_image is not None):
-                color_image = back_debug_image.copy()
+                color_image = back_debug_image
                 depth_frame = None
                 depth_val = 2.0
+                time.sleep(1.0 / CAMERA_FPS)
             else:
                 # Normal RealSense path
-                frames = pipeline.wait_for_frames()
-                align_to = rs.stream.color
-                align = rs.align(align_to)
-                aligned_frames = align.process(frames)
-                color_frame = aligned_frames.get_color_frame()
-                depth_frame = aligned_frames.get_depth_frame()
+                try:
+                    frames = pipeline.wait_for_frames()
+                except RuntimeError:
+                    if not active():
+                        return
+                    raise
+                depth_aligned = settings_store.get('depth_mode', 'project') == 'align'
+                if depth_aligned:
+                    frames = align.process(frames)
+                # Otherwise the raw depth frame is kept and only the plate
+                # boxes are projected into it (see emit)
+                color_frame = frames.get_color_frame()
+                depth_frame = frames.get_depth_frame()
                 if not color_frame or not depth_frame:
                     continue
-                color_image = np.asanyarray(color_frame.get_data())
-
-            image_height, image_width, _ = color_image.shape
-            image_center_x = image_width / 2
-
-            text_detection_feed = color_image.copy()
-            distance_detection_feed = color_image.copy()
-
-            plate_results = plate_model(color_image)
-
-            settings = load_settings()
-            mismatch_tolerance = settings.get('mismatch_tolerance', 1)
-
-            for plate_box in plate_results[0].boxes:
-                x1_plate, y1_plate, x2_plate, y2_plate = map(int, plate_box.xyxy[0])
-                plate_region = color_image[y1_plate:y2_plate, x1_plate:x2_plate]
+                # Copied into a pooled buffer so the RealSense frame is
+                # returned to the driver right away
+                frame = frame_pool.copy_of(np.asanyarray(color_frame.get_data()))
+                color_image = frame.array
+                depth_val = None
+
+            seq += 1
+            frame_counts['read'] = seq
+            # Never blocks: if detection is still busy the older frame is dropped
+            hand_off(detect_queue, FramePacket(seq, color_image, depth_frame, depth_val, depth_aligned, frame))
+
+    def detect_stage():
+        plate_boxes = []
+        while active():
+            try:
+                packet = detect_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            # YOLO only runs when the picture changed (or max_skip ran out)
+            if motion_gate.should_infer(packet.color_image):
+                started = time.perf_counter()
+                try:
+                    plate_boxes = inference_service.infer(orientation, packet.color_image)
+                except RuntimeError:
+                    # The service fails waiting frames when it is stopped
+                    if not active():
+                        return
+                    raise
+                record_timing('yolo', time.perf_counter() - started)
+            packet.plate_boxes = plate_boxes
+            hand_off(ocr_queue, packet)
+
+    def ocr_stage():
+        while active():
+            try:
+                packet = ocr_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            mismatch_tolerance = settings_store.get('mismatch_tolerance', 1)
+            # One database version for the whole frame, however the UI edits it
+            database = database_manager.snapshot()
+
+            policy = cascade_policy(settings_store.snapshot())
+            use_consensus = settings_store.get('ocr_consensus', True)
+
+            # Follow plates across frames: only new tracks, stale results and
+            # noticeably better crops go to OCR, the rest reuse their track
+            plate_crops = []
+            for track, plate_bbox in tracker.update(packet.plate_boxes):
+                x1_plate, y1_plate, x2_plate, y2_plate = plate_bbox
+                plate_region = packet.color_image[y1_plate:y2_plate, x1_plate:x2_plate]
                 if plate_region.size == 0:
                     continue
 
                 plate_gray = cv2.cvtColor(plate_region, cv2.COLOR_BGR2GRAY)
-                
-
-                text_tesseract = pytesseract.image_to_string(plate_gray, config=tesseract_config).strip()
-                result_easyocr = easyocr_reader.readtext(plate_gray, detail=0, allowlist='ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
-                text_easyocr = ''.join(result_easyocr).strip()
-
-                result_paddleocr = paddleocr_reader.ocr(plate_gray, cls=True)
-                text_paddleocr = ''
-                if result_paddleocr and isinstance(result_paddleocr, list):
-                    for line in result_paddleocr:
-                        if (line and isinstance(line, list) and len(line) > 1 and line[1]
-                            and isinstance(line[1], tuple) and len(line[1]) > 0 and line[1][0]):
-                            text_paddleocr += line[1][0]
-                text_paddleocr = text_paddleocr.strip()
-
-                ocr_results = {
-                    'Tesseract': local_normalize_text(text_tesseract),
-                    'EasyOCR': local_normalize_text(text_easyocr),
-                    'PaddleOCR': local_normalize_text(text_paddleocr)
-                }
-                
-                # ocr_results = {
-                    # 'Tesseract': '',
-                    # 'EasyOCR': '',
-                    # 'PaddleOCR''',
-                # }
-                
-                # ocr_task_Tessaract = asyncio.create_task(ocr_manager_async.ocr_Tessaract(plate_gray))
-                # ocr_task_EasyOCR = asyncio.create_task(ocr_manager_async.ocr_EasyOCR(plate_gray))
-                # ocr_task_PaddleOCR = asyncio.create_task(ocr_manager_async.ocr_PaddleOCR(plate_gray))
-
-                # results = await asyncio.gather(ocr_task_Tessaract, ocr_task_EasyOCR, ocr_task_PaddleOCR)
-                # ocr_results['Tesseract'] = results[0]
-                # ocr_results['EasyOCR'] = results[1]
-                # ocr_results['PaddleOCR'] = results[2]
-              
-
-                bbox_center_x = (x1_plate + x2_plate) / 2
-                bbox_center_y = (y1_plate + y2_plate) / 2
-                if depth_frame is not None:
-                    depth = depth_frame.get_distance(int(bbox_center_x), int(bbox_center_y))
+                quality = crop_quality(plate_gray)
+                # Tracks without a settled consensus keep collecting reads,
+                # up to consensus_max_attempts
+                if tracker.needs_ocr(track, quality) or (use_consensus and tracker.wants_consensus_read(track)):
+                    plate_crops.append((plate_bbox, plate_gray, track, quality))
                 else:
-                    depth = depth_val
-
-                distance_text = f"{depth:.2f}m"
-
-                # Debug overlay
-                text_offset_y = y2_plate + 60
-                for engine_name, rec_text in ocr_results.items():
-                    cv2.putText(text_detection_feed, f"{engine_name}: {rec_text}",
-                                (x1_plate, text_offset_y),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                    text_offset_y += 25
-
-                # Attempt fuzzy matches
-                plate_found = None
-                for engine_name, recognized_text in ocr_results.items():
-                    if recognized_text:
-                        match = fuzzy_match(recognized_text, database_entries, mismatch_tolerance)
-                        if match:
-                            plate_found = match
-                            break
-
-                if plate_found:
-                    # matched
-                    cv2.rectangle(distance_detection_feed, (x1_plate, y1_plate), (x2_plate, y2_plate), (0, 255, 0), 2)
-                    cv2.putText(distance_detection_feed, distance_text,
-                                (x1_plate, y2_plate + 20),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-
-                    horizontal_diff = bbox_center_x - image_center_x
-                    horizontal_offset = horizontal_diff / 2.0
-                    detection_queue.put(('police_car', plate_found, depth, horizontal_offset, orientation))
-
-                    now = time.time()
-                    if now - last_alert_time >= ALERT_COOLDOWN:
-                        last_alert_time = now
-                        detection_queue.put(('play_alert', 'UWAGA TAJNIAK!'))
-
-                else:
-                    # no match
-                    cv2.rectangle(distance_detection_feed, (x1_plate, y1_plate), (x2_plate, y2_plate), (255, 0, 0), 2)
-                    cv2.putText(distance_detection_feed, f"No Match | {distance_text}",
-                                (x1_plate, y2_plate + 20),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-
-            # Show debug windows
-            cv2.imshow(text_window_name, text_detection_feed)
-            cv2.imshow(distance_window_name, distance_detection_feed)
-
-            # --- Update front_last_frame / back_last_frame for UI previews
-            if orientation == "front":
-                front_last_frame = color_image.copy()
+                    packet.plate_reads.append((plate_bbox, track.ocr_results, track.plate_found))
+
+            for crop, ocr_results, plate_found in read_plate_crops(plate_crops, database, policy,
+                                                                   mismatch_tolerance, use_consensus, orientation):
+                plate_bbox, _, track, quality = crop
+                tracker.record_ocr(track, ocr_results, plate_found, quality)
+                packet.plate_reads.append((plate_bbox, track.ocr_results, track.plate_found))
+
+            hand_off(emit_queue, packet)
+
+    def emit(packet):
+        global last_alert_time
+        nonlocal last_preview
+
+        color_image = packet.color_image
+        depth_frame = packet.depth_frame
+
+        image_height, image_width, _ = color_image.shape
+        image_center_x = image_width / 2
+
+        plates = []
+        for (x1_plate, y1_plate, x2_plate, y2_plate), ocr_results, plate_found in packet.plate_reads:
+            bbox_center_x = (x1_plate + x2_plate) / 2
+            bbox_center_y = (y1_plate + y2_plate) / 2
+            started = time.perf_counter()
+            if depth_frame is None:
+                depth = packet.depth_val
+            elif packet.depth_aligned:
+                depth = depth_frame.get_distance(int(bbox_center_x), int(bbox_center_y))
             else:
-                back_last_frame = color_image.copy()
-            # ---
+                depth = depth_projector.region_distance(depth_frame, (x1_plate, y1_plate, x2_plate, y2_plate))
+            if depth_frame is not None:
+                record_timing('depth', time.perf_counter() - started)
+            plates.append(((x1_plate, y1_plate, x2_plate, y2_plate), ocr_results, plate_found, depth))
+
+            if plate_found:
+                horizontal_diff = bbox_center_x - image_center_x
+                horizontal_offset = horizontal_diff / 2.0
+                post_event(('police_car', plate_found, depth, horizontal_offset, orientation))
+
+                now = time.time()
+                if now - last_alert_time >= ALERT_COOLDOWN:
+                    last_alert_time = now
+                    post_event(('play_alert', 'UWAGA TAJNIAK!'))
+
+        # Publish the frame and its results for the UI previews and the
+        # detection viewer; debug images are not pooled, so they get a copy
+        frame = packet.frame if packet.frame is not None else frame_pool.copy_of(color_image)
+        frame_pool.publish(frame, DetectionResult(packet.seq, packet.captured_at, plates))
+        if packet.frame is None:
+            frame.release()
+
+        now = time.perf_counter()
+        if now - last_preview >= 1.0 / settings_store.get('preview_fps', 5):
+            last_preview = now
+            preview.update(color_image)
+        packet.release()
+
+        latency.add(time.perf_counter() - packet.captured_at)
+        frame_counts['emitted'] += 1
+
+    def replay_finished():
+        # Every frame read was either emitted or dropped by a queue
+        dropped = detect_queue.dropped + ocr_queue.dropped + emit_queue.dropped
+        return source_done.is_set() and frame_counts['emitted'] + dropped >= frame_counts['read']
+
+    def run_stage(stage):
+        try:
+            stage()
+        except BaseException as e:
+            stage_errors.append(e)
+            stopped.set()
+
+    stage_threads = [threading.Thread(target=run_stage, args=(stage,), daemon=True,
+                                      name=f"{orientation}-{stage.__name__}")
+                     for stage in (capture_stage, detect_stage, ocr_stage)]
+    for thread in stage_threads:
+        thread.start()
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                running = False
-                break
+    try:
+        while active():
+            try:
+                packet = emit_queue.get(timeout=0.1)
+            except queue.Empty:
+                if replay_finished():
+                    break
+                continue
+            emit(packet)
+
+        if stage_errors:
+            raise stage_errors[0]
 
     finally:
-        if not debug_mode:
+        stopped.set()
+        for thread in stage_threads:
+            thread.join(timeout=1.0)
+        settings_store.unsubscribe(on_setting_changed)
+        inference_service.unregister_camera(orientation)
+        if source is not None:
+            source.stop()
+        elif not debug_mode:
             pipeline.stop()
-        cv2.destroyWindow(text_window_name)
-        cv2.destroyWindow(distance_window_name)
+
+
+def stop_detection():
+    """
+    Signal every camera pipeline to stop.
+    """
+    global running
+    running = False
 
 
 def detection_thread_front():
@@ -0,0 +1,109 @@
+# detection_viewer.py
+
+import threading
+import time
+
+import cv2
+
+from settings_manager import settings_store
+
+
+def draw_overlays(text_detection_feed, distance_detection_feed, plates):
+    """
+    Draw the OCR reads and the match/distance boxes of `plates`
+    [(bbox, {engine name: text}, matched plate or None, distance), ...].
+    """
+    for (x1_plate, y1_plate, x2_plate, y2_plate), ocr_results, plate_found, depth in plates:
+        distance_text = f"{depth:.2f}m"
+
+        text_offset_y = y2_plate + 60
+        for engine_name, rec_text in ocr_results.items():
+            cv2.putText(text_detection_feed, f"{engine_name}: {rec_text}",
+                        (x1_plate, text_offset_y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            text_offset_y += 25
+
+        if plate_found:
+            # matched
+            cv2.rectangle(distance_detection_feed, (x1_plate, y1_plate), (x2_plate, y2_plate), (0, 255, 0), 2)
+            cv2.putText(distance_detection_feed, distance_text,
+                        (x1_plate, y2_plate + 20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+        else:
+            # no match
+            cv2.rectangle(distance_detection_feed, (x1_plate, y1_plate), (x2_plate, y2_plate), (255, 0, 0), 2)
+            cv2.putText(distance_detection_feed, f"No Match | {distance_text}",
+                        (x1_plate, y2_plate + 20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
+
+
+class DetectionViewer:
+    """
+    Shows the text and distance detection windows of every camera.
+
+    Runs on its own thread and renders, at most `fps` times per second, the
+    frame and results each camera last published in its FramePool, so the
+    detection stages never draw or touch the GUI. Frames already shown are
+    skipped. The windows are closed while the 'show_detection_windows'
+    setting is off; pressing 'q' in one of them calls `on_quit`.
+    """
+
+    def __init__(self, frame_pools: dict, fps: float = 10.0, on_quit=None):
+        self.frame_pools = frame_pools
+        self.fps = fps
+        self.on_quit = on_quit
+        self._stopped = threading.Event()
+        self._thread = None
+        self._shown_seq = {}
+        self._windows = set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='detection-viewer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def _render(self, orientation, frame_pool):
+        with frame_pool.published() as (frame, result):
+            if result is None or self._shown_seq.get(orientation) == result.seq:
+                return
+            self._shown_seq[orientation] = result.seq
+            text_feed = frame_pool.copy_of(frame)
+            distance_feed = frame_pool.copy_of(frame)
+        try:
+            draw_overlays(text_feed.array, distance_feed.array, result.plates)
+            text_window_name = f"Text Detection Feed ({orientation.title()})"
+            distance_window_name = f"Distance Detection Feed ({orientation.title()})"
+            # imshow keeps its own copy, so the buffers can go back right away
+            cv2.imshow(text_window_name, text_feed.array)
+            cv2.imshow(distance_window_name, distance_feed.array)
+            self._windows.update((text_window_name, distance_window_name))
+        finally:
+            text_feed.release()
+            distance_feed.release()
+
+    def _close_windows(self):
+        for window_name in self._windows:
+            cv2.destroyWindow(window_name)
+        self._windows.clear()
+        self._shown_seq.clear()
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                next_tick = time.monotonic() + 1.0 / self.fps
+                if settings_store.get('show_detection_windows', True):
+                    for orientation, frame_pool in list(self.frame_pools.items()):
+                        self._render(orientation, frame_pool)
+                    if self._windows and cv2.waitKey(1) & 0xFF == ord('q'):
+                        if self.on_quit is not None:
+                            self.on_quit()
+                        return
+                elif self._windows:
+                    self._close_windows()
+                self._stopped.wait(max(0.0, next_tick - time.monotonic()))
+        finally:
+            self._close_windows()
@@ -0,0 +1,112 @@
+# frame_pool.py
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class FrameBuffer:
+    """
+    A reusable image array owned by a FramePool.
+
+    The buffer starts with one reference; every extra holder calls
+    `retain()` and every holder calls `release()` when done. When the last
+    reference is released the array goes back to the pool, so it must not
+    be used after that.
+    """
+
+    def __init__(self, pool, array):
+        self.pool = pool
+        self.array = array
+        self._refs = 1
+
+    def retain(self):
+        with self.pool._lock:
+            self._refs += 1
+        return self
+
+    def release(self):
+        with self.pool._lock:
+            self._refs -= 1
+            if self._refs == 0:
+                self.pool._free[self.array.shape].append(self)
+
+
+class FramePool:
+    """
+    Per-camera pool of preallocated frame buffers.
+
+    `acquire(shape)` hands out a free buffer of that shape and only
+    allocates a new array when none is free; `allocations` counts those
+    (buffers made up front by `preallocate` are counted in `preallocated`).
+    One buffer can be published as the camera's latest frame, together with
+    whatever was detected in it, for readers such as the UI preview and the
+    detection viewer, which take it with `published()`.
+    """
+
+    def __init__(self, dtype=np.uint8):
+        self.dtype = dtype
+        self.preallocated = 0
+        self.allocations = 0
+        self._lock = threading.Lock()
+        self._free = defaultdict(list)
+        self._published = None
+        self._published_info = None
+
+    def preallocate(self, shape, count: int):
+        shape = tuple(shape)
+        with self._lock:
+            for _ in range(count):
+                self._free[shape].append(FrameBuffer(self, np.empty(shape, self.dtype)))
+                self.preallocated += 1
+
+    def acquire(self, shape) -> FrameBuffer:
+        shape = tuple(shape)
+        with self._lock:
+            free = self._free[shape]
+            if free:
+                buffer = free.pop()
+                buffer._refs = 1
+                return buffer
+            self.allocations += 1
+        return FrameBuffer(self, np.empty(shape, self.dtype))
+
+    def copy_of(self, image) -> FrameBuffer:
+        """
+        Acquire a buffer and copy `image` into it.
+        """
+        buffer = self.acquire(image.shape)
+        np.copyto(buffer.array, image)
+        return buffer
+
+    def publish(self, buffer: FrameBuffer, info=None):
+        """
+        Make `buffer` the latest frame; the pool keeps its own reference.
+        `info` is handed to readers along with it.
+        """
+        buffer.retain()
+        with self._lock:
+            previous, self._published = self._published, buffer
+            self._published_info = info
+        if previous is not None:
+            previous.release()
+
+    @contextmanager
+    def published(self):
+        """
+        Yield (latest published frame, its info), or (None, None), keeping
+        the frame out of reuse until the block ends.
+        """
+        with self._lock:
+            buffer = self._published
+            info = self._published_info
+            if buffer is not None:
+                buffer._refs += 1
+        try:
+            yield (buffer.array if buffer is not None else None), info
+        finally:
+            if buffer is not None:
+                buffer.release()
+
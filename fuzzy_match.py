@@ -1,5 +1,14 @@
 # fuzzy_match.py
 
+import itertools
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from plate_table import encode_strings
+
+
 def levenshtein_distance(s1: str, s2: str) -> int:
     """
     Compute the Levenshtein distance between two strings (case-insensitive).
@@ -31,23 +40,416 @@ def levenshtein_distance(s1: str, s2: str) -> int:
     return dp[m][n]
 
 
+# Patterns up to this length go through the bit-parallel kernel
+MYERS_MAX_LENGTH = 64
+
+
+def _myers_distance(pattern: str, text: str, max_distance: int) -> int:
+    """
+    Bit-parallel Levenshtein distance (Myers/Hyyrö). Each column of the DP
+    table is kept as two bit vectors, so one character of `text` costs a
+    handful of integer operations regardless of the pattern length.
+    Returns max_distance + 1 as soon as the result cannot fit the bound.
+    """
+    m, n = len(pattern), len(text)
+    peq = {}
+    for i, c in enumerate(pattern):
+        peq[c] = peq.get(c, 0) | (1 << i)
+
+    full = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv, mv = full, 0
+    score = m
+    for j, c in enumerate(text):
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        # The score can drop by at most one per remaining text character
+        if score - (n - j - 1) > max_distance:
+            return max_distance + 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+    return score
+
+
+def _banded_distance(s1: str, s2: str, max_distance: int) -> int:
+    """
+    Levenshtein distance restricted to the diagonal band |i - j| <= max_distance.
+    Cells outside the band can never lead to a result within the bound, so
+    they are left at max_distance + 1. Stops as soon as a whole row of the
+    band exceeds the bound.
+    """
+    m, n = len(s1), len(s2)
+    over = max_distance + 1
+    prev = [j if j <= max_distance else over for j in range(n + 1)]
+    for i in range(1, m + 1):
+        cur = [over] * (n + 1)
+        if i <= max_distance:
+            cur[0] = i
+        row_min = cur[0]
+        c1 = s1[i - 1]
+        for j in range(max(1, i - max_distance), min(n, i + max_distance) + 1):
+            value = prev[j - 1] + (0 if c1 == s2[j - 1] else 1)
+            if prev[j] + 1 < value:
+                value = prev[j] + 1
+            if cur[j - 1] + 1 < value:
+                value = cur[j - 1] + 1
+            if value > over:
+                value = over
+            cur[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return over
+        prev = cur
+    return prev[n]
+
+
+def levenshtein_within(s1: str, s2: str, max_distance: int) -> int:
+    """
+    Levenshtein distance between `s1` and `s2` if it is at most `max_distance`,
+    otherwise max_distance + 1. Strings are compared as given, so callers
+    pass already uppercased text.
+    """
+    m, n = len(s1), len(s2)
+    if abs(m - n) > max_distance:
+        return max_distance + 1
+    if s1 == s2:
+        return 0
+    if m == 0 or n == 0:
+        return max(m, n)
+
+    # Use the shorter string as the pattern so it fits in fewer bits
+    if m > n:
+        s1, s2, m, n = s2, s1, n, m
+    if m <= MYERS_MAX_LENGTH:
+        return _myers_distance(s1, s2, max_distance)
+    return _banded_distance(s1, s2, max_distance)
+
+
 def fuzzy_match(recognized_text: str, db_entries, mismatch_tolerance: int):
     """
     Return a matching plate from `db_entries` if recognized_text is 
     within `mismatch_tolerance` of any DB plate. Otherwise return None.
+    `db_entries` may be any iterable of plates or a `PlateIndex`; when
+    several plates are equally close the alphabetically first one wins.
     """
     recognized_text = recognized_text.strip().upper()
     if not recognized_text:
         return None
 
+    if isinstance(db_entries, PlateIndex):
+        return db_entries.nearest(recognized_text, mismatch_tolerance)[0]
+
+    if mismatch_tolerance < 0:
+        return None
+
     best_match = None
-    best_dist = float('inf')
+    best_dist = mismatch_tolerance
     for db_plate in db_entries:
-        dist = levenshtein_distance(recognized_text, db_plate)
-        if dist < best_dist:
+        dist = levenshtein_within(recognized_text, db_plate.upper(), best_dist)
+        if dist > best_dist:
+            continue
+        if best_match is None or dist < best_dist or db_plate < best_match:
             best_dist = dist
             best_match = db_plate
 
-    if best_dist <= mismatch_tolerance:
-        return best_match
-    return None
+    return best_match
+
+
+# Deletion variants stored per plate in PlateIndex; tolerances up to this
+# are answered from the index
+MAX_DELETES = 2
+
+# Multiplier of the polynomial hash of deletion variants (odd, mod 2**64)
+_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+def _hash_rows(codes, columns=None):
+    """
+    Hash the characters of each row in `columns` (default: all). Columns are
+    folded from the last one, so trailing zero padding leaves the hash at 0
+    and a string hashes the same whatever its padded width.
+    """
+    if columns is None:
+        columns = range(codes.shape[1])
+    h = np.zeros(len(codes), dtype=np.uint64)
+    for j in reversed(columns):
+        h *= _HASH_MULTIPLIER
+        h += codes[:, j]
+    return h
+
+
+def _deletion_entries(plates, ids, max_deletes: int):
+    """
+    Return (hashes, plate ids, deletions) for every variant of the uppercased
+    `plates` with up to `max_deletes` characters deleted, sorted by hash.
+    """
+    codes, lengths = encode_strings([plate.upper().encode('ascii', 'replace') for plate in plates])
+    width = codes.shape[1]
+    keys, owners, deletes = [np.zeros(0, dtype=np.uint64)], [np.zeros(0, dtype=np.int32)], [np.zeros(0, dtype=np.uint8)]
+    for count in range(max_deletes + 1):
+        for deleted in itertools.combinations(range(width), count):
+            # Deleting only padding would repeat a variant with fewer deletions
+            rows = np.flatnonzero(lengths > deleted[-1]) if deleted else np.arange(len(plates))
+            if not len(rows):
+                continue
+            kept = [j for j in range(width) if j not in deleted]
+            keys.append(_hash_rows(codes[rows], kept))
+            owners.append(ids[rows])
+            deletes.append(np.full(len(rows), count, dtype=np.uint8))
+    keys, owners, deletes = np.concatenate(keys), np.concatenate(owners), np.concatenate(deletes)
+    order = np.argsort(keys)
+    return keys[order], owners[order], deletes[order]
+
+
+def _deletion_variants(text: bytes, max_deletes: int):
+    """
+    Every distinct string made by deleting up to `max_deletes` characters of `text`.
+    """
+    variants = {text}
+    for count in range(1, min(max_deletes, len(text)) + 1):
+        for deleted in itertools.combinations(range(len(text)), count):
+            variants.add(bytes(c for i, c in enumerate(text) if i not in deleted))
+    return list(variants)
+
+
+class PlateIndex:
+    """
+    Deletion-neighbourhood (SymSpell-style) index over the plate database.
+
+    Two strings within k edits of each other can both be reduced to a common
+    string by deleting at most k characters from each. Every plate is
+    therefore stored under a hash of each of its variants with up to
+    `max_deletes` characters deleted, in one sorted NumPy array. A query
+    looks up the hashes of its own deletion variants and only computes the
+    distance to the plates found there. Tolerances above `max_deletes` fall
+    back to a linear scan.
+
+    Plates can be added and removed incrementally; removals are tombstoned
+    and the arrays are rebuilt once too many plates are dead.
+    """
+
+    # Rebuild the arrays once this fraction of the indexed plates has been removed
+    REBUILD_RATIO = 0.5
+
+    def __init__(self, plates=(), max_deletes: int = MAX_DELETES):
+        self.max_deletes = max_deletes
+        self._lock = threading.Lock()
+        self._build(plates)
+
+    def __len__(self):
+        return len(self._live)
+
+    def __contains__(self, plate):
+        return plate in self._live
+
+    def __iter__(self):
+        return iter(list(self._live))
+
+    def _build(self, plates):
+        self._plates = sorted(set(plates))
+        self._live = set(self._plates)
+        self._dead = set()
+        self._keys, self._ids, self._deletes = _deletion_entries(
+            self._plates, np.arange(len(self._plates), dtype=np.int32), self.max_deletes)
+
+    def _insert_all(self, plates):
+        # Plates get the next free ids; their entries are merged into the
+        # sorted arrays, which are replaced rather than modified
+        plates = sorted(plates)
+        ids = np.arange(len(self._plates), len(self._plates) + len(plates), dtype=np.int32)
+        self._plates = self._plates + plates
+        self._live.update(plates)
+        keys, owners, deletes = _deletion_entries(plates, ids, self.max_deletes)
+        positions = np.searchsorted(self._keys, keys)
+        self._keys = np.insert(self._keys, positions, keys)
+        self._ids = np.insert(self._ids, positions, owners)
+        self._deletes = np.insert(self._deletes, positions, deletes)
+
+    def _apply(self, added, removed):
+        for plate in removed:
+            if plate in self._live:
+                self._live.discard(plate)
+                self._dead.add(plate)
+        new_plates = []
+        for plate in set(added):
+            if plate in self._live:
+                continue
+            if plate in self._dead:
+                # Entries are still in the arrays, just bring it back to life
+                self._dead.discard(plate)
+                self._live.add(plate)
+            else:
+                new_plates.append(plate)
+        if new_plates:
+            self._insert_all(new_plates)
+        if len(self._dead) > self.REBUILD_RATIO * len(self._plates):
+            self._build(self._live)
+
+    def add(self, plate: str):
+        with self._lock:
+            self._apply([plate], ())
+
+    def discard(self, plate: str):
+        with self._lock:
+            self._apply((), [plate])
+
+    def with_changes(self, added=(), removed=()) -> 'PlateIndex':
+        """
+        Return a new index with `added` and `removed` applied, leaving this
+        one as it is. Only the entries of the added plates are computed;
+        the existing ones are copied into the merged arrays.
+        """
+        index = PlateIndex.__new__(PlateIndex)
+        index.max_deletes = self.max_deletes
+        index._lock = threading.Lock()
+        with self._lock:
+            index._plates = self._plates
+            index._live = set(self._live)
+            index._dead = set(self._dead)
+            index._keys, index._ids, index._deletes = self._keys, self._ids, self._deletes
+        index._apply(added, removed)
+        return index
+
+    def rebuild(self, plates):
+        """
+        Replace the whole content of the index with `plates`.
+        """
+        with self._lock:
+            self._build(plates)
+
+    def _candidates(self, query: str, max_distance: int):
+        # Plates sharing a deletion variant with `query`; a superset of the
+        # plates within max_distance
+        variants = _deletion_variants(query.encode('ascii', 'replace'), max_distance)
+        query_keys = _hash_rows(encode_strings(variants)[0])
+        low = np.searchsorted(self._keys, query_keys, 'left')
+        high = np.searchsorted(self._keys, query_keys, 'right')
+        found = set()
+        for start, end in zip(low.tolist(), high.tolist()):
+            if start < end:
+                ids = self._ids[start:end][self._deletes[start:end] <= max_distance]
+                found.update(ids.tolist())
+        return [self._plates[i] for i in found]
+
+    def _closest(self, query: str, max_distance: int):
+        # (distance, plate) for every live plate within max_distance
+        if max_distance <= self.max_deletes:
+            candidates = self._candidates(query, max_distance)
+        else:
+            candidates = self._live
+        found = []
+        for plate in candidates:
+            if plate not in self._live:
+                continue
+            dist = levenshtein_within(query, plate.upper(), max_distance)
+            if dist <= max_distance:
+                found.append((dist, plate))
+        return found
+
+    def nearest(self, query: str, max_distance: int):
+        """
+        Return (plate, distance) for the closest live plate within
+        `max_distance` of the already uppercased `query`, or (None, None).
+        Ties are broken the same way as the linear scan in `fuzzy_match`.
+        """
+        if max_distance < 0:
+            return None, None
+
+        with self._lock:
+            if query in self._live:
+                # Exact hit; an uppercase plate sorts before its case variants
+                return query, 0
+            found = self._closest(query, max_distance)
+
+        if not found:
+            return None, None
+        dist, plate = min(found)
+        return plate, dist
+
+    def within(self, query: str, max_distance: int, limit: int = None):
+        """
+        Return [(plate, distance), ...] for every live plate within
+        `max_distance` of the already uppercased `query`, closest first
+        (ties alphabetical), at most `limit` of them.
+        """
+        if max_distance < 0:
+            return []
+
+        with self._lock:
+            found = self._closest(query, max_distance)
+
+        found.sort()
+        return [(plate, dist) for dist, plate in found[:limit]]
+
+
+class MatchCache:
+    """
+    Bounded LRU cache of match results keyed on (normalized text, tolerance).
+    Entries belong to one database generation: a lookup with a newer
+    generation drops everything cached so far, lookups from readers still
+    on an older one bypass the cache. Keeps hit/miss counters.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = None
+
+    def _check_generation(self, generation) -> bool:
+        # True if `generation` is the one cached; a newer one replaces it
+        if self._generation is None or generation > self._generation:
+            self._entries.clear()
+            self._generation = generation
+        return generation == self._generation
+
+    def get(self, text: str, mismatch_tolerance: int, generation):
+        """
+        Return (True, cached result) on a hit, (False, None) on a miss.
+        """
+        key = (text.strip().upper(), mismatch_tolerance)
+        with self._lock:
+            if self._check_generation(generation) and key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, text: str, mismatch_tolerance: int, generation, result):
+        key = (text.strip().upper(), mismatch_tolerance)
+        with self._lock:
+            if not self._check_generation(generation):
+                return
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,139 @@
+# inference_service.py
+
+import threading
+import time
+from collections import deque
+
+
+class _Request:
+    def __init__(self, frame):
+        self.frame = frame
+        self.boxes = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class InferenceService:
+    """
+    Owns the YOLO plate model and runs it for all cameras.
+
+    Each camera loop hands in its latest frame with `infer()` and blocks until
+    its boxes are ready. A single worker thread collects the pending frames,
+    waiting at most `max_wait` seconds for the other registered cameras to
+    catch up, and runs them through the model as one batch. Works with any
+    number of cameras. `stop()` fails the frames still waiting; a camera
+    registering afterwards starts a new worker.
+    """
+
+    def __init__(self, models, model_name: str = 'yolo', max_wait: float = 0.02):
+        self.models = models
+        self.model_name = model_name
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._cameras = set()
+        self._pending = {}
+        # The current worker; a worker that is no longer it exits
+        self._thread = None
+        # (batch size, latency in seconds) of recent batches
+        self._batches = deque(maxlen=100)
+        self.batch_count = 0
+
+    def register_camera(self, camera: str):
+        with self._cond:
+            self._cameras.add(camera)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='yolo-inference', daemon=True)
+                self._thread.start()
+
+    def unregister_camera(self, camera: str):
+        with self._cond:
+            self._cameras.discard(camera)
+            self._cond.notify_all()
+
+    def infer(self, camera: str, frame):
+        """
+        Return the plate boxes [(x1, y1, x2, y2), ...] found in `frame`.
+        A newer frame from the same camera replaces one still waiting.
+        """
+        request = _Request(frame)
+        with self._cond:
+            if self._thread is None:
+                raise RuntimeError("Inference service is not running")
+            previous = self._pending.get(camera)
+            self._pending[camera] = request
+            self._cond.notify_all()
+        if previous is not None:
+            previous.boxes = []
+            previous.done.set()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.boxes
+
+    def stop(self):
+        with self._cond:
+            self._thread = None
+            pending = list(self._pending.values())
+            self._pending = {}
+            self._cond.notify_all()
+        for request in pending:
+            request.error = RuntimeError("Inference service stopped")
+            request.done.set()
+
+    def _take_batch(self):
+        worker = threading.current_thread()
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending or self._thread is not worker)
+            if self._thread is not worker:
+                return None
+            # Give the other cameras a moment to deliver their frames
+            deadline = time.monotonic() + self.max_wait
+            while self._thread is worker and not self._cameras.issubset(self._pending):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if self._thread is not worker:
+                return None
+            batch = self._pending
+            self._pending = {}
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            requests = list(batch.values())
+            start = time.perf_counter()
+            try:
+                model = self.models.get(self.model_name)
+                results = model([request.frame for request in requests])
+                for request, result in zip(requests, results):
+                    request.boxes = [tuple(map(int, box.xyxy[0])) for box in result.boxes]
+            except Exception as e:
+                for request in requests:
+                    request.error = e
+            latency = time.perf_counter() - start
+            with self._cond:
+                self._batches.append((len(requests), latency))
+                self.batch_count += 1
+            for request in requests:
+                request.done.set()
+
+    def stats(self) -> dict:
+        """
+        Batch size and latency over the recent batches.
+        """
+        with self._cond:
+            batches = list(self._batches)
+        if not batches:
+            return {'batches': self.batch_count, 'avg_batch_size': 0.0, 'avg_latency_ms': 0.0,
+                    'last_batch_size': 0, 'last_latency_ms': 0.0}
+        return {
+            'batches': self.batch_count,
+            'avg_batch_size': sum(size for size, _ in batches) / len(batches),
+            'avg_latency_ms': 1000 * sum(latency for _, latency in batches) / len(batches),
+            'last_batch_size': batches[-1][0],
+            'last_latency_ms': 1000 * batches[-1][1]
+        }
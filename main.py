@@ -1,26 +1,129 @@
 # main.py
 
+import time
+
+# Taken before the heavy imports so --measure-startup covers them too
+PROCESS_START = time.perf_counter()
+
+import argparse
+import queue
 import threading
 
-from detection import detection_thread_front, detection_thread_back, running
-from ui import create_app
+# The detection modules are imported in main(): on Windows every OCR worker
+# process re-imports this module, and must not load the detection pipeline
+# and the plate database along with it
+
+
+def measure_startup(app, imports_done):
+    """
+    Print how long it took for the window to appear, for detection to be
+    able to start and for each model to load, then close the app.
+    """
+    from detection import models, OCR_ENGINES
+
+    timings = {'imports': imports_done - PROCESS_START}
+
+    def window_shown():
+        timings['window'] = time.perf_counter() - PROCESS_START
+        poll_models()
+
+    def poll_models():
+        if 'detection_ready' not in timings and models.wait_for(['yolo'], any_of=OCR_ENGINES, timeout=0):
+            timings['detection_ready'] = time.perf_counter() - PROCESS_START
+        status = models.status()
+        if any(state in ('pending', 'loading') for state, _ in status.values()):
+            app.after(50, poll_models)
+            return
+        timings['all_models'] = time.perf_counter() - PROCESS_START
+
+        for name, seconds in timings.items():
+            print(f"startup {name}: {seconds:.3f}s")
+        for name, (state, seconds) in status.items():
+            print(f"model {name}: {state} in {seconds:.3f}s")
+        app.quit()
+
+    app.after(0, window_shown)
+
+
+def run_without_ui(detection_threads):
+    """
+    Print the detection events until the detection threads end or Ctrl+C.
+    """
+    from detection import detection_queue
+
+    try:
+        while any(thread.is_alive() for thread in detection_threads):
+            try:
+                item = detection_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item[0] == 'police_car':
+                _, plate, distance, horizontal_offset, orientation = item
+                print(f"{orientation}: {plate} at {distance:.2f}m, offset {horizontal_offset:.0f}")
+            elif item[0] == 'play_alert':
+                print(item[1])
+    except KeyboardInterrupt:
+        pass
 
 
 def main():
-    # Start the two RealSense detection threads in daemon mode
-    front_thread = threading.Thread(target=detection_thread_front, daemon=True)
-    back_thread = threading.Thread(target=detection_thread_back, daemon=True)
-    front_thread.start()
-    back_thread.start()
-
-    # Build and run the UI
-    app = create_app()
+    parser = argparse.ArgumentParser(description="Anty Tajniak")
+    parser.add_argument('--measure-startup', action='store_true',
+                        help="print startup timings and exit once all models are loaded")
+    parser.add_argument('--no-ui', action='store_true',
+                        help="run detection without the Tk window, printing detections")
+    parser.add_argument('--no-viewer', action='store_true',
+                        help="do not open the OpenCV detection windows")
+    parser.add_argument('--headless', action='store_true',
+                        help="same as --no-ui --no-viewer")
+    args = parser.parse_args()
+    use_ui = not (args.no_ui or args.headless)
+    if args.measure_startup and not use_ui:
+        parser.error("--measure-startup needs the UI")
+
+    from detection import (detection_thread_front, detection_thread_back, stop_detection, models,
+                           ocr_executor, inference_service, frame_pools)
+    from detection_viewer import DetectionViewer
+    from settings_manager import settings_store
+    imports_done = time.perf_counter()
+
+    # Build the models in the background while the window comes up
+    models.start_loading()
+
+    detection_threads = []
+    viewer = None
+    if not args.measure_startup:
+        # Start the two RealSense detection threads in daemon mode
+        detection_threads = [threading.Thread(target=detection_thread_front, daemon=True),
+                             threading.Thread(target=detection_thread_back, daemon=True)]
+        for thread in detection_threads:
+            thread.start()
+
+        # Overlays are drawn on the viewer's own thread, never in detection
+        if not (args.no_viewer or args.headless):
+            viewer = DetectionViewer(frame_pools, fps=settings_store.get('viewer_fps', 10),
+                                     on_quit=stop_detection)
+            viewer.start()
+
     try:
-        app.mainloop()
+        if use_ui:
+            # Imported here so --no-ui runs without Tk
+            from ui import create_app
+
+            # Build and run the UI
+            app = create_app()
+            if args.measure_startup:
+                measure_startup(app, imports_done)
+            app.mainloop()
+        else:
+            run_without_ui(detection_threads)
     finally:
         # When the UI is closed, signal detection loops to stop
-        global running
-        running = False
+        stop_detection()
+        if viewer is not None:
+            viewer.stop()
+        ocr_executor.shutdown()
+        inference_service.stop()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 # map_display.py
 
 import tkinter as tk
+from time import monotonic
 
 # We'll store references here so detection/UI can manipulate the map
 road_canvas = None
@@ -32,49 +33,110 @@ def show_map(parent_frame):
     update_map_display()
 
 
+# Icons as loaded from disk, and scaled copies keyed by (file, x factor,
+# y factor), so the many icon sizes of a resize share their images
+_icon_originals = {}
+_scaled_icons = {}
+
+# Canvas items kept between redraws: {'canvas', 'size', 'icon_size', 'road', 'user_car'}
+_map_items = {}
+
+POLICE_CAR_TAG = "police_car"
+
+# Police cars glide to a new position over this many seconds, all moved
+# together by one animation clock ticking every ANIMATION_INTERVAL ms
+ANIMATION_DURATION = 0.5
+ANIMATION_INTERVAL = 25
+_animation = {'after_id': None}
+
+
+def scaled_icon(path: str, icon_size: int):
+    """
+    Return the icon at `path` subsampled to roughly `icon_size` pixels,
+    loading and scaling it only the first time.
+    """
+    if path not in _icon_originals:
+        _icon_originals[path] = tk.PhotoImage(file=path)
+    original = _icon_originals[path]
+    w, h = original.width(), original.height()
+    if w == 0 or h == 0 or icon_size == 0:
+        return original
+
+    # Simple "subsample" scaling approach
+    x_factor, y_factor = max(1, w // icon_size), max(1, h // icon_size)
+    key = (path, x_factor, y_factor)
+    if key not in _scaled_icons:
+        _scaled_icons[key] = original.subsample(x_factor, y_factor)
+    return _scaled_icons[key]
+
+
 def update_map_display():
     """
-    Clears and re-draws the map canvas with the user car in the center.
+    Draws the map canvas with the user car in the center.
+
+    Canvas items are created once per canvas and afterwards only moved or
+    given new icons when the canvas size changes, so a redraw costs the
+    same however many police cars are on the map.
     """
     global road_canvas, car_image, police_car_image
 
     if not road_canvas:
         return
-    
-    # Clear existing
-    road_canvas.delete("all")
 
     # Dimensions
     canvas_width = road_canvas.winfo_width()
     canvas_height = road_canvas.winfo_height()
 
-    # Draw the background "road" as a big rectangle
-    road_canvas.create_rectangle(0, 0, canvas_width, canvas_height, fill="gray", outline="")
-
-    # Load user car & police car icons here or pass them in
-    # For demonstration, we assume you have .png images in the same folder
-    user_car_image_original = tk.PhotoImage(file="car_icon.png")
-    police_car_image_original = tk.PhotoImage(file="police_car_icon.png")
+    new_canvas = _map_items.get('canvas') is not road_canvas
+    if not new_canvas and _map_items['size'] == (canvas_width, canvas_height):
+        return
 
     # Choose an icon size
     smallest_dim = min(canvas_width, canvas_height)
     icon_size = int(smallest_dim * 0.25) if smallest_dim else 1
 
-    # Simple "subsample" scaling approach
-    def scale_image(original, target_size):
-        w, h = original.width(), original.height()
-        if w == 0 or h == 0 or target_size == 0:
-            return original
-        return original.subsample(max(1, w // target_size),
-                                  max(1, h // target_size))
-
-    car_image = scale_image(user_car_image_original, icon_size)
-    police_car_image = scale_image(police_car_image_original, icon_size)
+    # Load user car & police car icons (cached per scale factor)
+    # For demonstration, we assume you have .png images in the same folder
+    car_image = scaled_icon("car_icon.png", icon_size)
+    police_car_image = scaled_icon("police_car_icon.png", icon_size)
 
-    # Place user's car at center
     center_x = canvas_width / 2
     center_y = canvas_height / 2
-    road_canvas.create_image(center_x, center_y, image=car_image, anchor=tk.CENTER)
+
+    if new_canvas:
+        # The animation clock moves over to the new canvas
+        if _animation['after_id'] is not None and _map_items.get('canvas') is not None:
+            try:
+                _map_items['canvas'].after_cancel(_animation['after_id'])
+            except tk.TclError:
+                pass
+        _animation['after_id'] = None
+        _map_items.clear()
+        _map_items['canvas'] = road_canvas
+        # Draw the background "road" as a big rectangle
+        _map_items['road'] = road_canvas.create_rectangle(0, 0, canvas_width, canvas_height,
+                                                          fill="gray", outline="")
+        # Place user's car at center
+        _map_items['user_car'] = road_canvas.create_image(center_x, center_y, image=car_image,
+                                                          anchor=tk.CENTER)
+
+        # Re-draw any existing police cars that were saved in `police_cars`
+        for plate, car_info in police_cars.items():
+            # Recreate them at their last known location
+            x_old, y_old = car_info.get('x'), car_info.get('y')
+            car_info['canvas_id'] = road_canvas.create_image(x_old, y_old, image=police_car_image,
+                                                             anchor=tk.CENTER, tags=POLICE_CAR_TAG)
+        start_animation()
+    else:
+        road_canvas.coords(_map_items['road'], 0, 0, canvas_width, canvas_height)
+        road_canvas.coords(_map_items['user_car'], center_x, center_y)
+        if icon_size != _map_items['icon_size']:
+            road_canvas.itemconfigure(_map_items['user_car'], image=car_image)
+            # One call for every police car on the map
+            road_canvas.itemconfigure(POLICE_CAR_TAG, image=police_car_image)
+
+    _map_items['size'] = (canvas_width, canvas_height)
+    _map_items['icon_size'] = icon_size
 
     # Store some helpful references
     road_canvas.canvas_width = canvas_width
@@ -82,13 +144,6 @@ def update_map_display():
     road_canvas.center_x = center_x
     road_canvas.center_y = center_y
 
-    # Re-draw any existing police cars that were saved in `police_cars`
-    for plate, car_info in police_cars.items():
-        # Recreate or place them at their last known location
-        x_old, y_old = car_info.get('x'), car_info.get('y')
-        canvas_id = road_canvas.create_image(x_old, y_old, image=police_car_image, anchor=tk.CENTER)
-        car_info['canvas_id'] = canvas_id
-
 
 def place_or_move_police_car(plate: str, distance: float, horizontal_offset: float, orientation: str):
     """
@@ -125,54 +180,54 @@ def place_or_move_police_car(plate: str, distance: float, horizontal_offset: flo
 
     if plate not in police_cars:
         # Create new police car
-        canvas_id = road_canvas.create_image(x_pos_new, y_pos_new, image=police_car_image, anchor=tk.CENTER)
+        canvas_id = road_canvas.create_image(x_pos_new, y_pos_new, image=police_car_image,
+                                             anchor=tk.CENTER, tags=POLICE_CAR_TAG)
         police_cars[plate] = {
             'canvas_id': canvas_id,
             'last_detection_time': now,
             'x': x_pos_new,
-            'y': y_pos_new
+            'y': y_pos_new,
+            'target': None
         }
     else:
+        # Retarget: glide from wherever the car is drawn now
         car_info = police_cars[plate]
         car_info['last_detection_time'] = now
-        x_old, y_old = car_info['x'], car_info['y']
-        car_info['x'] = x_pos_new
-        car_info['y'] = y_pos_new
-
-        # Animate from old to new
-        animate_police_car_move(
-            current_step=0,
-            steps=20,
-            duration=500,
-            x_start=x_old,
-            y_start=y_old,
-            x_end=x_pos_new,
-            y_end=y_pos_new,
-            canvas_id=car_info['canvas_id'],
-            plate=plate
-        )
-
-
-def animate_police_car_move(current_step, steps, duration, x_start, y_start,
-                            x_end, y_end, canvas_id, plate):
+        car_info['target'] = (car_info['x'], car_info['y'], x_pos_new, y_pos_new, monotonic())
+        start_animation()
+
+
+def start_animation():
     """
-    Smoothly move the police car from (x_start, y_start) to (x_end, y_end).
+    Start the animation clock unless it is already running.
     """
-    from time import time
-    if plate not in police_cars:
-        return
-
-    if current_step > steps:
-        road_canvas.coords(canvas_id, x_end, y_end)
-        return
+    if _animation['after_id'] is None and road_canvas:
+        _animation['after_id'] = road_canvas.after(ANIMATION_INTERVAL, animate_police_cars)
 
-    ratio = current_step / float(steps)
-    x_mid = x_start + ratio * (x_end - x_start)
-    y_mid = y_start + ratio * (y_end - y_start)
 
-    road_canvas.coords(canvas_id, x_mid, y_mid)
+def animate_police_cars():
+    """
+    One tick of the animation clock: move every police car with a target
+    towards it, and keep ticking while any car is still moving.
+    """
+    _animation['after_id'] = None
+    if not road_canvas:
+        return
 
-    interval = int(duration / steps)
-    road_canvas.after(interval, animate_police_car_move, 
-                      current_step + 1, steps, duration,
-                      x_start, y_start, x_end, y_end, canvas_id, plate)
+    now = monotonic()
+    moving = False
+    for car_info in police_cars.values():
+        if car_info.get('target') is None:
+            continue
+        x_start, y_start, x_end, y_end, started = car_info['target']
+        ratio = min(1.0, (now - started) / ANIMATION_DURATION)
+        car_info['x'] = x_start + ratio * (x_end - x_start)
+        car_info['y'] = y_start + ratio * (y_end - y_start)
+        road_canvas.coords(car_info['canvas_id'], car_info['x'], car_info['y'])
+        if ratio < 1.0:
+            moving = True
+        else:
+            car_info['target'] = None
+
+    if moving:
+        start_animation()
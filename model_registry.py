@@ -0,0 +1,136 @@
+# model_registry.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING = 'pending'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class ModelRegistry:
+    """
+    Owns the heavy models (YOLO, OCR readers). Each model is registered with
+    a factory and built either in the background by `start_loading`, in
+    parallel with the others, or lazily by the first `get`. Nothing is
+    loaded at import time, so the UI can come up immediately.
+    """
+
+    def __init__(self):
+        self._changed = threading.Condition()
+        self._factories = {}
+        self._models = {}
+        self._status = {}
+        self._errors = {}
+        self._load_times = {}
+
+    def register(self, name: str, factory):
+        with self._changed:
+            self._factories[name] = factory
+            self._status[name] = PENDING
+
+    def names(self):
+        return list(self._factories)
+
+    def start_loading(self, names=None):
+        """
+        Load the given models (default: all pending ones) in parallel on
+        background threads. Returns immediately.
+        """
+        with self._changed:
+            names = [n for n in (names or self._factories) if self._status[n] == PENDING]
+            for name in names:
+                self._status[name] = LOADING
+        if not names:
+            return
+        executor = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix='model-loader')
+        for name in names:
+            executor.submit(self._load, name)
+        executor.shutdown(wait=False)
+
+    def _load(self, name: str):
+        start = time.perf_counter()
+        try:
+            model = self._factories[name]()
+        except Exception as e:
+            with self._changed:
+                self._status[name] = FAILED
+                self._errors[name] = e
+                self._load_times[name] = time.perf_counter() - start
+                self._changed.notify_all()
+            return
+        with self._changed:
+            self._models[name] = model
+            self._status[name] = READY
+            self._load_times[name] = time.perf_counter() - start
+            self._changed.notify_all()
+
+    def reload(self, name: str, model) -> bool:
+        """
+        Drop `model` and build the model again in the background, unless it
+        is no longer the loaded one (someone else reloaded it already).
+        peek() returns None until the new one is ready. Returns True if this
+        call started the reload.
+        """
+        with self._changed:
+            if self._models.get(name) is not model:
+                return False
+            del self._models[name]
+            self._status[name] = PENDING
+        self.start_loading([name])
+        return True
+
+    def get(self, name: str, timeout=None):
+        """
+        Return the model, building it on this thread if nobody has started
+        loading it yet. Waits up to `timeout` for a load in progress and
+        returns None if it failed or is still not ready.
+        """
+        with self._changed:
+            load_here = self._status[name] == PENDING
+            if load_here:
+                self._status[name] = LOADING
+        if load_here:
+            self._load(name)
+        with self._changed:
+            self._changed.wait_for(lambda: self._status[name] in (READY, FAILED), timeout)
+            return self._models.get(name)
+
+    def peek(self, name: str):
+        """
+        Return the model if it is already loaded, otherwise None. Never blocks.
+        """
+        return self._models.get(name)
+
+    def is_ready(self, name: str) -> bool:
+        return self._status.get(name) == READY
+
+    def wait_for(self, required=(), any_of=(), timeout=None) -> bool:
+        """
+        Block until every model in `required` and at least one in `any_of`
+        is ready. Returns False on timeout and raises RuntimeError when that
+        can no longer happen because models failed to load.
+        """
+        def done():
+            for name in required:
+                if self._status[name] == FAILED:
+                    raise RuntimeError(f"Model '{name}' failed to load") from self._errors[name]
+            if any_of and all(self._status[n] == FAILED for n in any_of):
+                raise RuntimeError(f"None of the models {list(any_of)} could be loaded")
+            return (all(self._status[n] == READY for n in required)
+                    and (not any_of or any(self._status[n] == READY for n in any_of)))
+
+        with self._changed:
+            return self._changed.wait_for(done, timeout)
+
+    def status(self) -> dict:
+        """
+        Return {name: (status, load time in seconds or None)} for all models.
+        """
+        with self._changed:
+            return {name: (self._status[name], self._load_times.get(name)) for name in self._factories}
+
+    def error(self, name: str):
+        return self._errors.get(name)
@@ -0,0 +1,62 @@
+# motion_gate.py
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Cheap pre-stage deciding whether a frame needs a new YOLO pass.
+
+    The frame is shrunk to a small grayscale thumbnail and compared with the
+    thumbnail of the last frame YOLO actually ran on. If the mean absolute
+    difference stays under `threshold` (0-255 gray levels) the previous boxes
+    are reused, but never for more than `max_skip` frames in a row.
+    """
+
+    def __init__(self, enabled: bool = True, threshold: float = 4.0, max_skip: int = 10,
+                 size=(80, 60)):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.size = tuple(size)
+        self.frames = 0
+        self.skipped = 0
+        self._keyframe = None
+        self._skipped_in_row = 0
+
+    def configure(self, enabled=None, threshold=None, max_skip=None, size=None):
+        if enabled is not None:
+            self.enabled = enabled
+        if threshold is not None:
+            self.threshold = threshold
+        if max_skip is not None:
+            self.max_skip = max_skip
+        if size is not None:
+            self.size = tuple(size)
+            self._keyframe = None
+
+    def should_infer(self, color_image) -> bool:
+        """
+        Return True if YOLO should run on `color_image`, False if the boxes
+        from the last inferred frame can be reused.
+        """
+        self.frames += 1
+        if not self.enabled:
+            return True
+
+        thumb = cv2.resize(cv2.cvtColor(color_image, cv2.COLOR_BGR2GRAY), self.size,
+                           interpolation=cv2.INTER_AREA)
+        if (self._keyframe is not None
+                and self._skipped_in_row < self.max_skip
+                and float(np.mean(cv2.absdiff(thumb, self._keyframe))) < self.threshold):
+            self._skipped_in_row += 1
+            self.skipped += 1
+            return False
+
+        self._keyframe = thumb
+        self._skipped_in_row = 0
+        return True
+
+    def skip_ratio(self) -> float:
+        return self.skipped / self.frames if self.frames else 0.0
@@ -0,0 +1,334 @@
+# ocr_manager_async.py
+
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+PLATE_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+
+# status is one of 'ok', 'timeout', 'error', 'unavailable', 'skipped'
+OcrResult = namedtuple('OcrResult', ['engine', 'text', 'confidence', 'elapsed', 'status'])
+
+# How `OcrExecutor.cascade` walks the engines, see `cascade_policy`
+CascadePolicy = namedtuple('CascadePolicy', ['order', 'match_confidence', 'reject_confidence', 'run_all'])
+
+
+def cascade_policy(settings: dict) -> CascadePolicy:
+    """
+    Build the cascade policy from the application settings.
+    """
+    return CascadePolicy(
+        order=tuple(settings.get('ocr_engine_order', ('Tesseract', 'EasyOCR', 'PaddleOCR'))),
+        match_confidence=float(settings.get('ocr_match_confidence', 0.6)),
+        reject_confidence=float(settings.get('ocr_reject_confidence', 0.9)),
+        run_all=not settings.get('ocr_cascade', True) or bool(settings.get('ocr_run_all_engines', False))
+    )
+
+
+class OcrBackend:
+    """
+    One OCR engine plugged into the OcrExecutor.
+
+    `load()` builds the engine (in this process for 'thread' backends, in
+    the worker process for 'process' backends) and `read()` turns a
+    grayscale plate crop into (text, confidence in 0..1).
+    """
+    name = None          # shown in overlays and used as result key
+    model_name = None    # key in the ModelRegistry
+    pool = 'thread'      # 'thread' or 'process'
+    workers = 1
+    timeout = 2.0        # seconds
+
+    def load(self):
+        raise NotImplementedError
+
+    def read(self, model, image):
+        raise NotImplementedError
+
+
+class TesseractBackend(OcrBackend):
+    """
+    Tesseract runs as a subprocess, so plain threads already run it in parallel.
+    """
+    name = 'Tesseract'
+    model_name = 'tesseract'
+    workers = 2
+    tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+    config = r'--oem 3 --psm 7 -c tessedit_char_whitelist=' + PLATE_CHARS
+
+    def load(self):
+        import pytesseract
+        pytesseract.pytesseract.tesseract_cmd = self.tesseract_cmd
+        return pytesseract
+
+    def read(self, pytesseract, image):
+        # pytesseract kills the subprocess after `timeout`, so a stuck read
+        # does not keep the worker thread busy
+        data = pytesseract.image_to_data(image, config=self.config, output_type=pytesseract.Output.DICT,
+                                         timeout=self.timeout)
+        words, confidences = [], []
+        for word, conf in zip(data['text'], data['conf']):
+            if word.strip() and float(conf) >= 0:
+                words.append(word.strip())
+                confidences.append(float(conf) / 100.0)
+        if not words:
+            return '', 0.0
+        return ''.join(words), min(confidences)
+
+
+class EasyOcrBackend(OcrBackend):
+    """
+    EasyOCR (PyTorch) releases the GIL during inference, so a thread is enough.
+    """
+    name = 'EasyOCR'
+    model_name = 'easyocr'
+
+    def load(self):
+        import easyocr
+        return easyocr.Reader(['en'])
+
+    def read(self, reader, image):
+        result = reader.readtext(image, detail=1, allowlist=PLATE_CHARS)
+        if not result:
+            return '', 0.0
+        text = ''.join(text for _, text, _ in result).strip()
+        return text, min(float(conf) for _, _, conf in result)
+
+
+class PaddleOcrBackend(OcrBackend):
+    """
+    PaddleOCR does a lot of its pre/post-processing in Python, which would
+    hold the GIL against the detection threads, so it gets its own process.
+    """
+    name = 'PaddleOCR'
+    model_name = 'paddleocr'
+    pool = 'process'
+    timeout = 3.0
+
+    def load(self):
+        from paddleocr import PaddleOCR
+        return PaddleOCR(lang='en', use_angle_cls=True)
+
+    def read(self, paddleocr_reader, image):
+        result_paddleocr = paddleocr_reader.ocr(image, cls=True)
+        text_paddleocr = ''
+        confidences = []
+        if result_paddleocr and isinstance(result_paddleocr, list):
+            for line in result_paddleocr:
+                if (line and isinstance(line, list) and len(line) > 1 and line[1]
+                        and isinstance(line[1], tuple) and len(line[1]) > 0 and line[1][0]):
+                    text_paddleocr += line[1][0]
+                    if len(line[1]) > 1:
+                        confidences.append(float(line[1][1]))
+        return text_paddleocr.strip(), min(confidences) if confidences else 0.0
+
+
+DEFAULT_BACKENDS = (TesseractBackend, EasyOcrBackend, PaddleOcrBackend)
+
+
+# --- PROCESS WORKERS ---
+# Process backends keep their engine in a global of the worker process.
+_worker_backend = None
+_worker_model = None
+
+
+def _init_process_worker(backend_cls):
+    global _worker_backend, _worker_model
+    _worker_backend = backend_cls()
+    _worker_model = _worker_backend.load()
+
+
+def _process_ping():
+    return _worker_backend.name
+
+
+def _process_read(image):
+    return _worker_backend.read(_worker_model, image)
+
+
+def start_process_pool(backend):
+    """
+    Start the worker processes of a 'process' backend and wait until the
+    engine has loaded in them. Used as the backend's ModelRegistry factory.
+    """
+    pool = ProcessPoolExecutor(max_workers=backend.workers,
+                               initializer=_init_process_worker,
+                               initargs=(type(backend),))
+    pool.submit(_process_ping).result()
+    return pool
+
+
+def stop_process_pool(pool):
+    """
+    Shut a process pool down without waiting for the calls in progress;
+    its worker processes are killed.
+    """
+    # ProcessPoolExecutor has no public way to stop a running call
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+# -----------------------
+
+
+class OcrExecutor:
+    """
+    Runs every OCR backend on its own worker pool so the engines read a plate
+    crop concurrently instead of one after another.
+
+    Engines are loaded through the shared ModelRegistry; engines that are
+    not ready yet are reported as 'unavailable' instead of blocking.
+    """
+
+    def __init__(self, models, backends=None):
+        self.models = models
+        self.backends = [cls() for cls in (backends or DEFAULT_BACKENDS)]
+        self._thread_pools = {}
+        for backend in self.backends:
+            if backend.pool == 'process':
+                models.register(backend.model_name, lambda b=backend: start_process_pool(b))
+            else:
+                models.register(backend.model_name, backend.load)
+                self._thread_pools[backend.name] = ThreadPoolExecutor(
+                    max_workers=backend.workers, thread_name_prefix=f'ocr-{backend.model_name}')
+
+    def model_names(self):
+        return [backend.model_name for backend in self.backends]
+
+    def engine_names(self):
+        return [backend.name for backend in self.backends]
+
+    def submit(self, image, engines=None):
+        """
+        Start reading `image` with the given engines (default: all of them).
+        Returns a handle for `as_completed` / `collect`: (backend, future,
+        start time, model) per engine. An engine whose pool no longer takes
+        calls is reported 'unavailable'; a broken process pool is replaced.
+        """
+        submitted = []
+        for backend in self.backends:
+            if engines is not None and backend.name not in engines:
+                continue
+            model = self.models.peek(backend.model_name)
+            future = None
+            try:
+                if backend.pool == 'process' and model is not None:
+                    future = model.submit(_process_read, image)
+                elif model is not None:
+                    future = self._thread_pools[backend.name].submit(backend.read, model, image)
+            except BrokenProcessPool:
+                # A worker process died; later reads get a fresh pool
+                self._replace_process_pool(backend, model)
+            except RuntimeError:
+                # The pool was shut down since peek(): replaced after a
+                # timeout (the new one is loading) or the executor stopped
+                pass
+            submitted.append((backend, future, time.monotonic(), model))
+        return submitted
+
+    def as_completed(self, submitted):
+        """
+        Yield an OcrResult per engine as soon as it finishes. Engines that
+        run over their own timeout are given up on and yield status 'timeout'.
+        A process engine still busy with the call gets fresh workers, so the
+        next reads do not queue behind it.
+        """
+        pending = {}
+        for backend, future, started, model in submitted:
+            if future is None:
+                yield OcrResult(backend.name, '', 0.0, 0.0, 'unavailable')
+            else:
+                pending[future] = (backend, started, model)
+
+        while pending:
+            deadline = min(started + backend.timeout for backend, started, _ in pending.values())
+            done, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future in done:
+                backend, started, model = pending.pop(future)
+                try:
+                    text, confidence = future.result()
+                    yield OcrResult(backend.name, text, confidence, now - started, 'ok')
+                except BrokenProcessPool:
+                    # A worker process died; later reads get a fresh pool
+                    self._replace_process_pool(backend, model)
+                    yield OcrResult(backend.name, '', 0.0, now - started, 'error')
+                except Exception:
+                    yield OcrResult(backend.name, '', 0.0, now - started, 'error')
+            for future, (backend, started, model) in list(pending.items()):
+                if now >= started + backend.timeout:
+                    del pending[future]
+                    if not future.cancel() and backend.pool == 'process':
+                        self._replace_process_pool(backend, model)
+                    yield OcrResult(backend.name, '', 0.0, now - started, 'timeout')
+
+    def collect(self, submitted):
+        """
+        Wait for all engines and return {engine name: OcrResult} in backend order.
+        """
+        results = {result.engine: result for result in self.as_completed(submitted)}
+        return {backend.name: results[backend.name] for backend, *_ in submitted}
+
+    def read(self, image, engines=None):
+        return self.collect(self.submit(image, engines))
+
+    def cascade(self, image, match, policy: CascadePolicy):
+        """
+        Run the engines one at a time in `policy.order` (cheapest first) and
+        stop as soon as the outcome is settled: an engine read matches the
+        database with at least `match_confidence`, or an engine is at least
+        `reject_confidence` sure of a text that matches nothing.
+        `match(text)` returns the database plate or None.
+
+        Returns ({engine name: OcrResult} in policy order, matched plate or
+        None). Engines that were not needed report status 'skipped'.
+        """
+        results = {}
+        plate_found = None
+        settled = False
+        backend_names = self.engine_names()
+        for name in policy.order:
+            if name not in backend_names:
+                continue
+            if settled:
+                if self.models.peek(self._backend(name).model_name) is not None:
+                    results[name] = OcrResult(name, '', 0.0, 0.0, 'skipped')
+                else:
+                    results[name] = OcrResult(name, '', 0.0, 0.0, 'unavailable')
+                continue
+
+            result = self.read(image, engines=[name])[name]
+            results[name] = result
+            if result.status != 'ok' or not result.text:
+                continue
+            plate = match(result.text)
+            if plate:
+                # The first engine with a hit decides the plate, a confident
+                # one also ends the cascade
+                if plate_found is None:
+                    plate_found = plate
+                if result.confidence >= policy.match_confidence:
+                    settled = True
+            elif plate_found is None and result.confidence >= policy.reject_confidence:
+                settled = True
+
+        return results, plate_found
+
+    def _replace_process_pool(self, backend, pool):
+        # Only the first of several timed out calls on the same pool replaces it
+        if self.models.reload(backend.model_name, pool):
+            stop_process_pool(pool)
+
+    def _backend(self, name: str):
+        return next(backend for backend in self.backends if backend.name == name)
+
+    def shutdown(self):
+        for pool in self._thread_pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        for backend in self.backends:
+            if backend.pool == 'process':
+                pool = self.models.peek(backend.model_name)
+                if pool is not None:
+                    stop_process_pool(pool)
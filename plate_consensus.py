@@ -0,0 +1,61 @@
+# plate_consensus.py
+
+from collections import defaultdict, deque
+
+
+class PlateConsensus:
+    """
+    Combines the OCR reads of one tracked plate, across frames and engines,
+    into a single string.
+
+    Reads vote first on the plate length, then character by character among
+    the reads of the winning length. Each vote is weighted by the engine
+    confidence and the crop size. The result is settled once at least
+    `min_reads` reads agree by at least `min_agreement` on the length and on
+    every character position.
+    """
+
+    def __init__(self, min_reads: int = 3, min_agreement: float = 0.6, max_reads: int = 30):
+        self.min_reads = min_reads
+        self.min_agreement = min_agreement
+        self.reads = deque(maxlen=max_reads)
+
+    def add(self, text: str, confidence: float, crop_area: float):
+        if not text:
+            return
+        # Engines that report no confidence still get a small say
+        self.reads.append((text, max(confidence, 0.05) * crop_area))
+
+    def vote(self):
+        """
+        Return (consensus text, agreement in 0..1), or (None, 0.0) with no reads.
+        """
+        if not self.reads:
+            return None, 0.0
+
+        length_weights = defaultdict(float)
+        for text, weight in self.reads:
+            length_weights[len(text)] += weight
+        total_weight = sum(length_weights.values())
+        length = max(length_weights, key=lambda n: (length_weights[n], n))
+        agreement = length_weights[length] / total_weight
+
+        same_length = [(text, weight) for text, weight in self.reads if len(text) == length]
+        chars = []
+        for position in range(length):
+            char_weights = defaultdict(float)
+            for text, weight in same_length:
+                char_weights[text[position]] += weight
+            char = max(char_weights, key=lambda c: (char_weights[c], c))
+            chars.append(char)
+            agreement = min(agreement, char_weights[char] / length_weights[length])
+        return ''.join(chars), agreement
+
+    def settled(self):
+        """
+        Return the consensus text once it is stable, otherwise None.
+        """
+        if len(self.reads) < self.min_reads:
+            return None
+        text, agreement = self.vote()
+        return text if agreement >= self.min_agreement else None
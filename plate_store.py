@@ -0,0 +1,110 @@
+# plate_store.py
+
+import os
+import tempfile
+import threading
+
+# Compact the journal into the snapshot once it holds this many operations
+COMPACT_EVERY = 1000
+
+
+class PlateStore:
+    """
+    Crash-safe persistence for the plate database.
+
+    The full list lives in a snapshot file (one plate per line). Every add
+    or remove is appended to a journal next to it ('+PLATE' / '-PLATE'),
+    so a change costs one short write instead of rewriting the whole list.
+    Once the journal holds `compact_every` operations it is folded into a
+    new snapshot, written to a temporary file and swapped in atomically,
+    and the journal is emptied. Loading reads the snapshot and replays the
+    journal; a line cut short by a crash is ignored.
+    """
+
+    def __init__(self, snapshot_path: str, journal_path: str = None, compact_every: int = COMPACT_EVERY):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or snapshot_path + '.journal'
+        self.compact_every = compact_every
+        self.journal_length = 0
+        self._lock = threading.Lock()
+        self._journal = None
+
+    def load(self) -> set:
+        plates = set()
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                # Each line is one plate
+                plates = {line.strip() for line in f if line.strip()}
+
+        self.journal_length = 0
+        torn = False
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        # Torn write at the end of the journal
+                        torn = True
+                        break
+                    op, plate = line[:1], line[1:].strip()
+                    if not plate:
+                        continue
+                    if op == '+':
+                        plates.add(plate)
+                    elif op == '-':
+                        plates.discard(plate)
+                    self.journal_length += 1
+
+        # Start from a clean journal rather than appending after a torn line
+        if torn or self.needs_compaction():
+            self.compact(plates)
+        return plates
+
+    def _append(self, lines):
+        with self._lock:
+            if self._journal is None:
+                self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            self._journal.write(''.join(lines))
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self.journal_length += len(lines)
+
+    def record_add(self, plates):
+        self._append([f"+{plate}\n" for plate in plates])
+
+    def record_remove(self, plates):
+        self._append([f"-{plate}\n" for plate in plates])
+
+    def needs_compaction(self) -> bool:
+        return self.journal_length >= self.compact_every
+
+    def compact(self, plates):
+        """
+        Write `plates` as the new snapshot and empty the journal.
+        """
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+            fd, tmp_path = tempfile.mkstemp(prefix='.plates-', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(''.join(plate + "\n" for plate in sorted(plates)))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.snapshot_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+
+            # Replaying the old journal over the new snapshot would give the
+            # same set, so a crash before this point loses nothing
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            open(self.journal_path, 'w', encoding='utf-8').close()
+            self.journal_length = 0
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
@@ -0,0 +1,171 @@
+# plate_table.py
+
+import bisect
+import heapq
+
+import numpy as np
+
+# Above this many added plates the sorted list is merged instead of
+# inserting one plate at a time
+MERGE_THRESHOLD = 64
+
+
+def encode_strings(strings):
+    """
+    Encode byte strings as a zero-padded uint8 matrix (one row each) plus
+    a vector of their lengths.
+    """
+    width = max((len(s) for s in strings), default=0)
+    if width == 0:
+        return np.zeros((len(strings), 0), dtype=np.uint8), np.zeros(len(strings), dtype=np.intp)
+    codes = np.array(strings, dtype=f'S{width}').view(np.uint8).reshape(len(strings), width)
+    lengths = np.fromiter((len(s) for s in strings), dtype=np.intp, count=len(strings))
+    return codes, lengths
+
+
+class PlateTable:
+    """
+    The plate database encoded as a fixed-width uint8 matrix (one padded row
+    of ASCII codes per plate) plus a vector of plate lengths. Lets a whole
+    batch of OCR reads be scored against every plate with NumPy instead of
+    one Python Levenshtein call per (read, plate) pair.
+
+    The table is immutable; `with_changes` returns an updated copy.
+    """
+
+    def __init__(self, plates=()):
+        # Sorted, so that argmin picks the alphabetically first of equally
+        # close plates, same as fuzzy_match
+        self.plates = sorted(plates)
+        self.codes, self.lengths = encode_strings([plate.upper().encode('ascii', 'replace')
+                                                   for plate in self.plates])
+        self.width = self.codes.shape[1]
+
+    def __len__(self):
+        return len(self.plates)
+
+    @classmethod
+    def _from_rows(cls, plates, codes, lengths):
+        table = cls.__new__(cls)
+        table.plates = plates
+        table.codes = codes
+        table.lengths = lengths
+        table.width = codes.shape[1]
+        return table
+
+    def with_changes(self, added=(), removed=()) -> 'PlateTable':
+        """
+        Return a new table with `added` and `removed` applied, leaving this
+        one as it is. Rows are deleted and inserted at their sorted
+        positions, so only the changed plates are encoded.
+        """
+        plates = self.plates
+        removed_rows = []
+        for plate in set(removed):
+            row = bisect.bisect_left(plates, plate)
+            if row < len(plates) and plates[row] == plate:
+                removed_rows.append(row)
+        removed_rows.sort()
+        codes, lengths = self.codes, self.lengths
+        if removed_rows:
+            plates = list(plates)
+            for row in reversed(removed_rows):
+                del plates[row]
+            codes = np.delete(codes, removed_rows, axis=0)
+            lengths = np.delete(lengths, removed_rows)
+
+        new_plates = []
+        for plate in sorted(set(added)):
+            row = bisect.bisect_left(plates, plate)
+            if row == len(plates) or plates[row] != plate:
+                new_plates.append(plate)
+        if new_plates:
+            new_codes, new_lengths = encode_strings([plate.upper().encode('ascii', 'replace')
+                                                     for plate in new_plates])
+            width = max(codes.shape[1], new_codes.shape[1])
+            codes = np.pad(codes, ((0, 0), (0, width - codes.shape[1])))
+            new_codes = np.pad(new_codes, ((0, 0), (0, width - new_codes.shape[1])))
+            # Positions in the current list; np.insert and the merge below
+            # both keep the sorted order
+            positions = [bisect.bisect_left(plates, plate) for plate in new_plates]
+            codes = np.insert(codes, positions, new_codes, axis=0)
+            lengths = np.insert(lengths, positions, new_lengths)
+            if len(new_plates) > MERGE_THRESHOLD:
+                plates = list(heapq.merge(plates, new_plates))
+            else:
+                plates = list(plates) if plates is self.plates else plates
+                for position, plate in zip(reversed(positions), reversed(new_plates)):
+                    plates.insert(position, plate)
+
+        return PlateTable._from_rows(plates, codes, lengths)
+
+    @staticmethod
+    def _encode_queries(queries):
+        return encode_strings([q.strip().upper().encode('ascii', 'replace') for q in queries])
+
+    def distances(self, queries):
+        """
+        Return an (len(queries), len(self)) array with the Levenshtein
+        distance between every query and every plate (case-insensitive).
+
+        The DP runs over query rows and plate columns like the scalar
+        version, but each cell is computed for all (query, plate) pairs at
+        once.
+        """
+        query_codes, query_lengths = self._encode_queries(queries)
+        n_queries, n_plates = len(query_codes), len(self.plates)
+        result = np.zeros((n_queries, n_plates), dtype=np.uint16)
+        if n_queries == 0 or n_plates == 0:
+            return result
+
+        plate_idx = np.arange(n_plates)
+        # prev[j] holds row i - 1 of the DP for plate prefix length j
+        prev = np.empty((self.width + 1, n_queries, n_plates), dtype=np.uint16)
+        for j in range(self.width + 1):
+            prev[j] = j
+        cur = np.empty_like(prev)
+        cost = np.empty((n_queries, n_plates), dtype=np.uint16)
+
+        # Empty queries: distance is just the plate length
+        for q in np.flatnonzero(query_lengths == 0):
+            result[q] = prev[self.lengths, q, plate_idx]
+
+        for i in range(1, query_codes.shape[1] + 1):
+            cur[0] = i
+            query_chars = query_codes[:, i - 1, None]
+            for j in range(1, self.width + 1):
+                np.not_equal(query_chars, self.codes[None, :, j - 1], out=cost)
+                np.add(prev[j - 1], cost, out=cur[j])
+                np.minimum(cur[j], prev[j] + 1, out=cur[j])
+                np.minimum(cur[j], cur[j - 1] + 1, out=cur[j])
+            # Queries that end on this row read their distance off the
+            # column matching each plate's own length
+            for q in np.flatnonzero(query_lengths == i):
+                result[q] = cur[self.lengths, q, plate_idx]
+            prev, cur = cur, prev
+
+        return result
+
+    def match_batch(self, queries, mismatch_tolerance: int):
+        """
+        Score all `queries` against the table in one pass. Returns a list of
+        (plate, distance) per query, or (None, None) when the closest plate
+        is further than `mismatch_tolerance` or the query is empty.
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        if not self.plates or mismatch_tolerance < 0:
+            return [(None, None)] * len(queries)
+
+        dist = self.distances(queries)
+        best = dist.argmin(axis=1)
+        best_dist = dist[np.arange(len(queries)), best]
+
+        matches = []
+        for query, row, d in zip(queries, best, best_dist):
+            if query.strip() and d <= mismatch_tolerance:
+                matches.append((self.plates[row], int(d)))
+            else:
+                matches.append((None, None))
+        return matches
@@ -0,0 +1,152 @@
+# plate_tracker.py
+
+import itertools
+
+from plate_consensus import PlateConsensus
+
+
+def bbox_iou(a, b) -> float:
+    """
+    Intersection over union of two (x1, y1, x2, y2) boxes.
+    """
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / float(area_a + area_b - inter)
+
+
+def bbox_center(bbox):
+    return (bbox[0] + bbox[2]) / 2.0, (bbox[1] + bbox[3]) / 2.0
+
+
+class Track:
+    """
+    One plate followed across frames, with the OCR outcome settled for it.
+    """
+
+    def __init__(self, track_id: int, bbox, consensus: PlateConsensus):
+        self.track_id = track_id
+        self.bbox = bbox
+        self.hits = 1
+        self.missed = 0            # consecutive frames without a detection
+        self.frames_since_ocr = None
+        self.ocr_quality = 0.0     # quality of the crop the current OCR came from
+        self.ocr_results = {}
+        self.ocr_attempts = 0      # OCR passes so far, empty reads included
+        self.plate_found = None
+        self.consensus = consensus
+
+    def has_ocr(self) -> bool:
+        return self.frames_since_ocr is not None
+
+
+class PlateTracker:
+    """
+    Lightweight multi-object tracker between YOLO and OCR.
+
+    Boxes are associated with existing tracks greedily by IoU, falling back
+    to centroid distance (relative to the box size) for fast-moving plates.
+    Tracks not seen for `max_missed` frames are dropped. A track is OCR'd
+    when it is new, every `reocr_interval` frames, or when the crop is at
+    least `quality_gain` times better than the one its result came from.
+    Each track also collects its reads in a PlateConsensus; while it has not
+    settled the track may be read on every frame, but only for its first
+    `consensus_max_attempts` OCR passes.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_center_shift: float = 0.75,
+                 max_missed: int = 10, reocr_interval: int = 30, quality_gain: float = 1.5,
+                 consensus_min_reads: int = 3, consensus_min_agreement: float = 0.6,
+                 consensus_max_attempts: int = 10):
+        self.iou_threshold = iou_threshold
+        self.max_center_shift = max_center_shift
+        self.max_missed = max_missed
+        self.reocr_interval = reocr_interval
+        self.quality_gain = quality_gain
+        self.consensus_min_reads = consensus_min_reads
+        self.consensus_min_agreement = consensus_min_agreement
+        self.consensus_max_attempts = consensus_max_attempts
+        self.tracks = []
+        self._ids = itertools.count(1)
+
+    def _center_close(self, track_bbox, bbox) -> bool:
+        (tx, ty), (bx, by) = bbox_center(track_bbox), bbox_center(bbox)
+        size = max(track_bbox[2] - track_bbox[0], track_bbox[3] - track_bbox[1], 1)
+        return ((tx - bx) ** 2 + (ty - by) ** 2) ** 0.5 <= self.max_center_shift * size
+
+    def update(self, bboxes):
+        """
+        Associate this frame's boxes with tracks. Returns a list of
+        (track, bbox) in the order of `bboxes`; unmatched boxes start new
+        tracks. Ages every track and drops the stale ones.
+        """
+        bboxes = list(bboxes)
+        candidates = []
+        for t, track in enumerate(self.tracks):
+            for b, bbox in enumerate(bboxes):
+                iou = bbox_iou(track.bbox, bbox)
+                if iou >= self.iou_threshold:
+                    candidates.append((1.0 + iou, t, b))
+                elif self._center_close(track.bbox, bbox):
+                    candidates.append((iou, t, b))
+        candidates.sort(reverse=True)
+
+        assigned = {}
+        used_tracks = set()
+        for _, t, b in candidates:
+            if t in used_tracks or b in assigned:
+                continue
+            used_tracks.add(t)
+            assigned[b] = self.tracks[t]
+
+        for t, track in enumerate(self.tracks):
+            if t not in used_tracks:
+                track.missed += 1
+            if track.frames_since_ocr is not None:
+                track.frames_since_ocr += 1
+
+        result = []
+        for b, bbox in enumerate(bboxes):
+            track = assigned.get(b)
+            if track is None:
+                track = Track(next(self._ids), bbox,
+                              PlateConsensus(self.consensus_min_reads, self.consensus_min_agreement))
+                self.tracks.append(track)
+            else:
+                track.bbox = bbox
+                track.hits += 1
+                track.missed = 0
+            result.append((track, bbox))
+
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+        return result
+
+    def needs_ocr(self, track: Track, quality: float) -> bool:
+        if not track.has_ocr():
+            return True
+        if track.frames_since_ocr >= self.reocr_interval:
+            return True
+        return quality >= track.ocr_quality * self.quality_gain
+
+    def wants_consensus_read(self, track: Track) -> bool:
+        """
+        True while the track's consensus is unsettled and it has had fewer
+        than `consensus_max_attempts` OCR passes.
+        """
+        return track.ocr_attempts < self.consensus_max_attempts and track.consensus.settled() is None
+
+    def record_ocr(self, track: Track, ocr_results: dict, plate_found, quality: float):
+        """
+        Store the OCR outcome for the track. A plate once matched is kept
+        even if a later read of the same track misses the database.
+        """
+        track.ocr_results = ocr_results
+        if plate_found or not track.plate_found:
+            track.plate_found = plate_found
+        track.ocr_quality = quality
+        track.frames_since_ocr = 0
+        track.ocr_attempts += 1
@@ -0,0 +1,54 @@
+# preview_buffer.py
+
+import threading
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+
+class PreviewBuffer:
+    """
+    Small, double-buffered RGB copy of a camera's frames for the UI.
+
+    The detection side calls `update()` with a full BGR frame; it is shrunk
+    to fit `max_size` (keeping the aspect ratio) and converted to RGB in the
+    back buffer, which is then swapped with the front one. Readers take the
+    front buffer with `latest()` and compare `version` to skip frames they
+    already showed.
+    """
+
+    def __init__(self, max_size=(160, 90)):
+        self.max_size = tuple(max_size)
+        self.version = 0
+        self._lock = threading.Lock()
+        self._front = None
+        self._back = None
+        self._scaled = None
+        self._frame_shape = None
+
+    def update(self, frame_bgr):
+        # Buffers are only (re)allocated when the frame size changes
+        if self._frame_shape != frame_bgr.shape:
+            self._frame_shape = frame_bgr.shape
+            height, width = frame_bgr.shape[:2]
+            scale = min(self.max_size[0] / width, self.max_size[1] / height, 1.0)
+            self._scaled = np.empty((max(1, int(height * scale)), max(1, int(width * scale)), 3), np.uint8)
+        if self._back is None or self._back.shape != self._scaled.shape:
+            self._back = np.empty_like(self._scaled)
+        height, width = self._back.shape[:2]
+        cv2.resize(frame_bgr, (width, height), dst=self._scaled, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._scaled, cv2.COLOR_BGR2RGB, dst=self._back)
+        # Readers only ever look at the front buffer, under the lock
+        with self._lock:
+            self._front, self._back = self._back, self._front
+            self.version += 1
+
+    @contextmanager
+    def latest(self):
+        """
+        Yield (version, RGB image), or (0, None) before the first update.
+        The image must not be kept after the block ends.
+        """
+        with self._lock:
+            yield self.version, self._front if self.version else None
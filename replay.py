@@ -0,0 +1,263 @@
+# replay.py
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+import pyrealsense2 as rs
+
+from depth_sampling import DepthProjector
+from settings_manager import settings_store
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# Distance reported for image folders, which have no depth (as in debug mode)
+FOLDER_DEPTH = 2.0
+
+PERCENTILES = (50, 90, 99)
+
+# Same as detection.CAMERA_FPS. detection is imported inside the functions
+# below: on Windows every OCR worker process re-imports this module, and
+# must not load the detection pipeline and the plate database with it
+DEFAULT_FPS = 15
+
+
+class ImageFolderSource:
+    """
+    Frames from the images in a folder, in file name order, with a fixed
+    distance instead of depth. With `real_time` they are delivered at `fps`.
+    """
+
+    def __init__(self, folder: str, fps: float = DEFAULT_FPS, real_time: bool = False):
+        self.path = folder
+        self.paths = [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+                      if name.lower().endswith(IMAGE_EXTENSIONS)]
+        self.fps = fps
+        self.real_time = real_time
+        self._next = 0
+        self._started_at = None
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        # No depth frames, so no projector
+        return None
+
+    def read(self):
+        while self._next < len(self.paths):
+            n = self._next
+            self._next += 1
+            if self.real_time:
+                delay = self._started_at + n / self.fps - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            image = cv2.imread(self.paths[n], cv2.IMREAD_COLOR)
+            if image is not None:
+                return image, None, FOLDER_DEPTH, False
+        return None
+
+    def stop(self):
+        pass
+
+
+class SessionSource:
+    """
+    Frames from a RealSense recording (.bag) played back without looping.
+    With `real_time` the playback keeps the recorded pace, otherwise frames
+    are delivered as fast as they are read.
+    """
+
+    def __init__(self, path: str, real_time: bool = False):
+        self.path = path
+        self.real_time = real_time
+        self.pipeline = rs.pipeline()
+        self.align = rs.align(rs.stream.color)
+        self.playback = None
+
+    def start(self):
+        config = rs.config()
+        config.enable_device_from_file(self.path, repeat_playback=False)
+        profile = self.pipeline.start(config)
+        self.playback = profile.get_device().as_playback()
+        self.playback.set_real_time(self.real_time)
+        return DepthProjector(profile)
+
+    def read(self):
+        while True:
+            ok, frames = self.pipeline.try_wait_for_frames(1000)
+            if not ok:
+                if self.playback.current_status() == rs.playback_status.stopped:
+                    return None
+                continue
+            depth_aligned = settings_store.get('depth_mode', 'project') == 'align'
+            if depth_aligned:
+                frames = self.align.process(frames)
+            color_frame = frames.get_color_frame()
+            depth_frame = frames.get_depth_frame()
+            if color_frame and depth_frame:
+                return np.asanyarray(color_frame.get_data()), depth_frame, None, depth_aligned
+
+    def stop(self):
+        self.pipeline.stop()
+
+
+def peak_memory_mb():
+    """
+    Peak resident memory of this process in MB, or None if unknown.
+    """
+    try:
+        import resource
+    except ImportError:
+        # Windows: psutil is optional
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(stats):
+    summary = {'count': stats.count}
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = round(stats.percentile(p) * 1000, 3)
+    return summary
+
+
+def run_replay(source, orientation: str = 'front'):
+    """
+    Feed `source` through run_detection once and return the results as a
+    JSON-ready dict. The models are loaded before the clock starts.
+    """
+    import detection
+
+    detection.models.start_loading()
+    detection.models.wait_for(['yolo'], any_of=detection.OCR_ENGINES)
+    # Engines that fail to load are left out, as in the app
+    while any(state in ('pending', 'loading') for state, _ in detection.models.status().values()):
+        time.sleep(0.05)
+
+    # Keep every sample of this run for the percentiles
+    detection.LATENCY_WINDOW = 10 ** 7
+    detection.stage_timings.clear()
+
+    # Nothing consumes the events here; count them as they arrive
+    events = {'police_car': 0, 'play_alert': 0}
+
+    def drain_events():
+        while True:
+            item = detection.detection_queue.get()
+            if item is None:
+                return
+            events[item[0]] = events.get(item[0], 0) + 1
+
+    drainer = threading.Thread(target=drain_events, daemon=True)
+    drainer.start()
+
+    started = time.perf_counter()
+    try:
+        detection.run_detection(None, orientation, None, source=source)
+    finally:
+        duration = time.perf_counter() - started
+        detection.detection_queue.put(None)
+        drainer.join()
+
+    stats = detection.pipeline_stats[orientation]
+    frames = stats['frames']
+    return {
+        'commit': git_commit(),
+        'source': source.path,
+        'real_time': source.real_time,
+        'ocr_engines': list(detection.OCR_ENGINES),
+        'frames_read': frames['read'],
+        'frames_emitted': frames['emitted'],
+        'frames_dropped': {name: q.dropped for name, q in stats['queues'].items()},
+        'duration_s': round(duration, 3),
+        'fps': round(frames['emitted'] / duration, 2) if duration else 0.0,
+        'frame_latency': summarize(stats['latency']),
+        'stages': {name: summarize(stage) for name, stage in sorted(detection.stage_timings.items())},
+        'events': events,
+        'frame_buffer_allocations': stats['frame_pool'].allocations,
+        'peak_memory_mb': peak_memory_mb(),
+    }
+
+
+def print_results(results, baseline=None):
+    def change(value, old):
+        if old is None or not old:
+            return ""
+        return f" ({(value - old) / old * 100:+.1f}%)"
+
+    base_stages = baseline.get('stages', {}) if baseline else {}
+    print(f"commit {results['commit']}: {results['frames_emitted']}/{results['frames_read']} frames "
+          f"in {results['duration_s']:.2f}s")
+    print(f"throughput: {results['fps']:.2f} FPS{change(results['fps'], baseline and baseline.get('fps'))}")
+    print(f"{'stage':<24}{'count':>8}" + ''.join(f"{f'p{p} ms':>12}" for p in PERCENTILES))
+    rows = [('frame latency', results['frame_latency'], baseline and baseline.get('frame_latency'))]
+    rows += [(name, stage, base_stages.get(name)) for name, stage in results['stages'].items()]
+    for name, stage, old in rows:
+        cells = ''.join(f"{stage[f'p{p}_ms']:>12.2f}" for p in PERCENTILES)
+        print(f"{name:<24}{stage['count']:>8}{cells}{change(stage['p50_ms'], old and old['p50_ms'])}")
+    if results['peak_memory_mb'] is not None:
+        print(f"peak memory: {results['peak_memory_mb']:.0f} MB"
+              f"{change(results['peak_memory_mb'], baseline and baseline.get('peak_memory_mb'))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded frames through the detection pipeline "
+                                                 "and report per-stage latency, throughput and memory")
+    parser.add_argument('source', help="folder of images or a RealSense recording (.bag)")
+    parser.add_argument('--real-time', action='store_true',
+                        help="deliver frames at the camera/recorded rate (frames may be dropped) "
+                             "instead of as fast as the pipeline takes them")
+    parser.add_argument('--fps', type=float, default=DEFAULT_FPS,
+                        help="frame rate of an image folder with --real-time")
+    parser.add_argument('--orientation', choices=('front', 'back'), default='front',
+                        help="camera whose settings (motion gate) are used")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.source):
+        source = ImageFolderSource(args.source, args.fps, args.real_time)
+        if not source.paths:
+            parser.error(f"no images in {args.source}")
+    else:
+        source = SessionSource(args.source, args.real_time)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    import detection
+
+    try:
+        results = run_replay(source, args.orientation)
+    finally:
+        detection.ocr_executor.shutdown()
+        detection.inference_service.stop()
+
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
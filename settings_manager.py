@@ -1,32 +1,168 @@
 # settings_manager.py
 
+import atexit
 import json
+import os
+import tempfile
 import threading
 
 SETTINGS_FILE = 'app_settings.json'
 settings_lock = threading.Lock()
 
+DEFAULT_SETTINGS = {
+    'mismatch_tolerance': 1,
+    'volume_level': 100,
+    # OCR cascade: engines are tried cheapest first and the rest skipped once
+    # a confident match or confident non-match is found
+    'ocr_cascade': True,
+    'ocr_engine_order': ['Tesseract', 'EasyOCR', 'PaddleOCR'],
+    'ocr_match_confidence': 0.6,
+    'ocr_reject_confidence': 0.9,
+    'ocr_run_all_engines': False,
+    # Per-plate consensus over frames and engines: only the settled string
+    # is matched against the database
+    'ocr_consensus': True,
+    'consensus_min_reads': 3,
+    'consensus_min_agreement': 0.6,
+    # OCR attempts (empty reads included) a track gets every frame while its
+    # consensus is unsettled; after that it is re-read on the usual schedule
+    'consensus_max_attempts': 10,
+    # Skip YOLO on frames that barely changed, per camera (see MotionGate)
+    'motion_gate': {
+        'front': {'enabled': True, 'threshold': 4.0, 'max_skip': 10},
+        'back': {'enabled': True, 'threshold': 4.0, 'max_skip': 10}
+    },
+    # Plate distance: 'project' reads the raw depth frame under the projected
+    # plate box (see DepthProjector), 'align' aligns every depth frame to color
+    'depth_mode': 'project',
+    # OpenCV detection windows, drawn off the detection threads by the
+    # DetectionViewer at most viewer_fps times per second
+    'show_detection_windows': True,
+    'viewer_fps': 10,
+    # Debug screen camera previews: refresh rate and largest size (w, h)
+    'preview_fps': 5,
+    'preview_size': [160, 90]
+}
+
+# Changes are written to disk at most this often (seconds)
+WRITE_DELAY = 0.5
+
+
+class SettingsStore:
+    """
+    In-memory copy of the application settings.
+
+    Readers (detection threads) get values without taking a lock: the
+    current values live in a dict that is never modified, only replaced
+    by writers. Subscribers are called on every change, and changes are
+    written to disk in the background, coalesced over WRITE_DELAY and
+    replaced atomically so a crash cannot leave a half-written file.
+    """
+
+    def __init__(self, path: str, defaults: dict, write_delay: float = WRITE_DELAY):
+        self.path = path
+        self.write_delay = write_delay
+        self._defaults = dict(defaults)
+        self._values = dict(defaults)
+        self._subscribers = []
+        self._write_timer = None
+        self._dirty = False
+        self.reload()
+
+    def reload(self):
+        """
+        Re-read the settings file, falling back to defaults if it is
+        missing or corrupted.
+        """
+        values = dict(self._defaults)
+        with settings_lock:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    loaded = json.load(f)
+                if isinstance(loaded, dict):
+                    values.update(loaded)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+        self._values = values
+
+    def get(self, key: str, default=None):
+        return self._values.get(key, default)
+
+    def snapshot(self) -> dict:
+        """
+        Return the current settings. The dict must be treated as read-only.
+        """
+        return self._values
+
+    def subscribe(self, callback):
+        """
+        Call `callback(key, value)` whenever a setting changes. Callbacks
+        run on the thread that made the change.
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def set(self, key: str, value):
+        self.update({key: value})
+
+    def update(self, changes: dict):
+        with settings_lock:
+            changed = {k: v for k, v in changes.items() if self._values.get(k, object()) != v}
+            if not changed:
+                return
+            values = dict(self._values)
+            values.update(changed)
+            self._values = values
+            self._dirty = True
+            if self._write_timer is None:
+                self._write_timer = threading.Timer(self.write_delay, self.flush)
+                self._write_timer.daemon = True
+                self._write_timer.start()
+
+        for key, value in changed.items():
+            for callback in list(self._subscribers):
+                callback(key, value)
+
+    def flush(self):
+        """
+        Write pending changes to disk now.
+        """
+        with settings_lock:
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+                self._write_timer = None
+            if not self._dirty:
+                return
+            values = self._values
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix='.settings-', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(values, f, ensure_ascii=False, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            self._dirty = False
+
+
+settings_store = SettingsStore(SETTINGS_FILE, DEFAULT_SETTINGS)
+atexit.register(settings_store.flush)
+
 
 def load_settings():
-    with settings_lock:
-        try:
-            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            # Return default settings if no file found
-            return {
-                'mismatch_tolerance': 1,
-                'volume_level': 100
-            }
-        except json.JSONDecodeError:
-            # Return defaults if file is corrupted
-            return {
-                'mismatch_tolerance': 1,
-                'volume_level': 100
-            }
+    """
+    Return a copy of the current settings.
+    """
+    return dict(settings_store.snapshot())
 
 
 def save_settings(settings: dict):
-    with settings_lock:
-        with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(settings, f, ensure_ascii=False, indent=2)
+    settings_store.update(settings)
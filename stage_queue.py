@@ -0,0 +1,80 @@
+# stage_queue.py
+
+import queue
+import threading
+from collections import deque
+
+
+class StageQueue:
+    """
+    Bounded hand-off between two pipeline stages.
+
+    `put` never blocks: when the queue is full the oldest item is dropped,
+    so a slow consumer always gets the most recent data instead of a
+    growing backlog. `get` blocks like queue.Queue.get and raises
+    queue.Empty on timeout. A producer that must not lose items can call
+    `wait_for_room` before `put`.
+    """
+
+    def __init__(self, maxsize: int = 1):
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.put_count = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item):
+        """
+        Add `item`, returning the item that was dropped to make room (or None).
+        """
+        dropped = None
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                dropped = self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify_all()
+        return dropped
+
+    def get(self, timeout=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                raise queue.Empty
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def wait_for_room(self, timeout=None) -> bool:
+        """
+        Wait until a `put` would not drop anything. Returns False on timeout.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self._items) < self.maxsize, timeout)
+
+
+class LatencyStats:
+    """
+    Rolling window of latency samples (seconds) with percentiles.
+    """
+
+    def __init__(self, window: int = 300):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def percentile(self, p: float) -> float:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))
+        return samples[index]
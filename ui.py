@@ -1,22 +1,28 @@
 # ui.py
 
+import os
 import tkinter as tk
-from tkinter.filedialog import askopenfilename
+from tkinter.filedialog import askopenfilename, askopenfilenames, asksaveasfilename
 import customtkinter as ctk
 import threading
 import time
 import queue
-import cv2
+import heapq
 from PIL import Image, ImageTk  # for thumbnail previews
 
-from settings_manager import load_settings, save_settings
+from settings_manager import settings_store
+from stage_queue import LatencyStats
+from ui_events import UiWaker
 from database_manager import (
-    database_entries,
-    refresh_database_list,
+    match_cache,
+    search_plates,
     add_plate_entry,
-    remove_selected_plate
+    remove_selected_plate,
+    import_plates,
+    export_plates
 )
 import map_display
+from virtual_list import VirtualList
 from detection import (
     detection_queue, running,
     front_debug_mode, back_debug_mode,
@@ -32,25 +38,60 @@ def show_database_screen(camera_frame):
     title_label = ctk.CTkLabel(camera_frame, text="Baza tajniaków", font=("Arial", 20), text_color="white")
     title_label.pack(pady=10)
 
+    # Incremental search: prefix matches first, then plates within the
+    # mismatch tolerance, so a plate can be checked without scrolling
+    search_frame = ctk.CTkFrame(camera_frame, fg_color="transparent")
+    search_frame.pack(pady=(0, 5))
+    search_label = ctk.CTkLabel(search_frame, text="Szukaj:", font=("Arial", 14), text_color="white")
+    search_label.grid(row=0, column=0, padx=10)
+    search_var = tk.StringVar()
+    search_entry = ctk.CTkEntry(search_frame, font=("Arial", 14), width=300, textvariable=search_var)
+    search_entry.grid(row=0, column=1, padx=10)
+
     list_frame = ctk.CTkFrame(camera_frame, corner_radius=10, fg_color="#2e2e2e")
     list_frame.pack(pady=20, fill="both", expand=True)
 
-    scrollbar = tk.Scrollbar(list_frame, orient="vertical")
-    plate_listbox = tk.Listbox(
-        list_frame, 
-        yscrollcommand=scrollbar.set,
-        font=("Arial", 14),
-        bg="#121212",
-        fg="white",
-        selectbackground="#333333",
-        highlightthickness=0,
-        selectforeground="white"
-    )
-    scrollbar.config(command=plate_listbox.yview)
-    scrollbar.pack(side="right", fill="y")
-    plate_listbox.pack(side="left", fill="both", expand=True)
-
-    refresh_database_list(plate_listbox)
+    # Only the rows in view are drawn, however large the database is
+    plate_listbox = VirtualList(list_frame)
+    plate_listbox.pack(fill="both", expand=True)
+
+    # Searches run off the Tk thread (the first fuzzy one also builds the
+    # plate index); only the newest search's result is shown
+    search_state = {'after': None, 'generation': 0}
+
+    def refresh_plate_list(plate_list=plate_listbox):
+        search_state['generation'] += 1
+        generation = search_state['generation']
+        query = search_var.get()
+        mismatch_tolerance = settings_store.get('mismatch_tolerance', 1)
+        result = {}
+
+        def run_search():
+            try:
+                result['plates'] = search_plates(query, mismatch_tolerance)
+            finally:
+                result['done'] = True
+
+        def show_result():
+            if generation != search_state['generation']:
+                return
+            if 'done' not in result:
+                camera_frame.after(30, show_result)
+                return
+            if 'plates' in result:
+                plate_list.set_items(result['plates'])
+
+        threading.Thread(target=run_search, daemon=True).start()
+        show_result()
+
+    def on_search_changed(*_):
+        # Wait for a pause in typing before searching
+        if search_state['after'] is not None:
+            camera_frame.after_cancel(search_state['after'])
+        search_state['after'] = camera_frame.after(150, refresh_plate_list)
+
+    search_var.trace_add('write', on_search_changed)
+    refresh_plate_list()
 
     control_frame = ctk.CTkFrame(camera_frame, corner_radius=10, fg_color="#2e2e2e")
     control_frame.pack(pady=20)
@@ -63,20 +104,70 @@ def show_database_screen(camera_frame):
     add_entry.grid(row=0, column=1, padx=10, pady=10)
 
     add_button = ctk.CTkButton(control_frame, text="Dodaj", width=100,
-                               command=lambda: add_plate_entry(add_entry, plate_listbox))
+                               command=lambda: add_plate_entry(add_entry, plate_listbox, refresh_plate_list))
     add_button.grid(row=0, column=2, padx=10, pady=10)
 
     remove_button = ctk.CTkButton(control_frame, text="Usuń zaznaczoną", width=100,
-                                  command=lambda: remove_selected_plate(plate_listbox))
+                                  command=lambda: remove_selected_plate(plate_listbox, refresh_plate_list))
     remove_button.grid(row=0, column=3, padx=10, pady=10)
 
+    # Bulk import / export of text and CSV plate lists
+    file_types = [("Listy tablic", "*.txt *.csv"), ("Wszystkie pliki", "*.*")]
+    import_status_label = ctk.CTkLabel(control_frame, text="", font=("Arial", 12),
+                                       text_color="white", justify="left")
+    import_status_label.grid(row=2, column=0, columnspan=4, padx=10, pady=5, sticky="w")
+
+    def import_files():
+        paths = askopenfilenames(filetypes=file_types)
+        if not paths:
+            return
+        import_status_label.configure(text="Importowanie…")
+        import_button.configure(state="disabled")
+        result = {}
+
+        # Large files are read off the Tk thread; the outcome is picked up below
+        def run_import():
+            try:
+                result['report'] = import_plates(paths)
+            except Exception as e:
+                result['error'] = e
+
+        def check_import():
+            if not result:
+                camera_frame.after(100, check_import)
+                return
+            import_button.configure(state="normal")
+            if 'error' in result:
+                import_status_label.configure(text=f"Błąd importu: {result['error']}")
+                return
+            import_status_label.configure(text="\n".join(
+                f"{os.path.basename(path)}: {counts['accepted']} dodanych, "
+                f"{counts['duplicate']} duplikatów, {counts['rejected']} odrzuconych"
+                for path, counts in result['report']))
+            refresh_plate_list()
+
+        threading.Thread(target=run_import, daemon=True).start()
+        check_import()
+
+    def export_file():
+        path = asksaveasfilename(defaultextension=".txt", filetypes=file_types)
+        if path:
+            count = export_plates(path)
+            import_status_label.configure(text=f"{os.path.basename(path)}: wyeksportowano {count} tablic")
+
+    import_button = ctk.CTkButton(control_frame, text="Importuj…", width=100, command=import_files)
+    import_button.grid(row=1, column=2, padx=10, pady=10)
+
+    export_button = ctk.CTkButton(control_frame, text="Eksportuj…", width=100, command=export_file)
+    export_button.grid(row=1, column=3, padx=10, pady=10)
+
 
 def show_settings_screen(camera_frame):
     # Clear parent frame
     for widget in camera_frame.winfo_children():
         widget.pack_forget()
 
-    settings = load_settings()
+    settings = settings_store.snapshot()
 
     title_label = ctk.CTkLabel(camera_frame, text="Ustawienia", font=("Arial", 24, "bold"), text_color="white")
     title_label.pack(pady=20)
@@ -103,8 +194,7 @@ def show_settings_screen(camera_frame):
     def update_mismatch_tolerance(value):
         val = int(float(value))
         mismatch_value_label.configure(text=f"Obecna wartość: {val}")
-        settings['mismatch_tolerance'] = val
-        save_settings(settings)
+        settings_store.set('mismatch_tolerance', val)
 
     mismatch_slider = ctk.CTkSlider(mismatch_frame, from_=0, to=5,
                                     number_of_steps=5,
@@ -140,8 +230,7 @@ def show_settings_screen(camera_frame):
         val = int(float(value))
         val = max(0, min(val, 100))
         volume_value_label.configure(text=f"Obecna wartość: {val}%")
-        settings['volume_level'] = val
-        save_settings(settings)
+        settings_store.set('volume_level', val)
 
     volume_slider = ctk.CTkSlider(volume_frame, from_=0, to=100,
                                   number_of_steps=100,
@@ -149,6 +238,34 @@ def show_settings_screen(camera_frame):
     volume_slider.set(settings.get('volume_level', 100))
     volume_slider.pack(pady=10, padx=20, fill="x")
 
+    # --- OCR Cascade ---
+    ocr_frame = ctk.CTkFrame(settings_frame)
+    ocr_frame.pack(pady=10, padx=10, fill="x")
+
+    ocr_label = ctk.CTkLabel(ocr_frame, text="Silniki OCR",
+                             font=("Arial", 16),
+                             text_color="black")
+    ocr_label.pack(pady=5)
+
+    cascade_var = tk.BooleanVar(value=settings.get('ocr_cascade', True))
+    cascade_switch = ctk.CTkSwitch(
+        ocr_frame, text="Tryb kaskadowy (pomijaj kolejne silniki po pewnym wyniku)",
+        variable=cascade_var, text_color="black",
+        command=lambda: settings_store.set('ocr_cascade', cascade_var.get()))
+    cascade_switch.pack(pady=5, padx=20, anchor="w")
+
+    run_all_var = tk.BooleanVar(value=settings.get('ocr_run_all_engines', False))
+    run_all_switch = ctk.CTkSwitch(
+        ocr_frame, text="Zawsze uruchamiaj wszystkie silniki (debug)",
+        variable=run_all_var, text_color="black",
+        command=lambda: settings_store.set('ocr_run_all_engines', run_all_var.get()))
+    run_all_switch.pack(pady=5, padx=20, anchor="w")
+
+    order_label = ctk.CTkLabel(
+        ocr_frame, text="Kolejność: " + " → ".join(settings.get('ocr_engine_order', [])),
+        font=("Arial", 12), text_color="black")
+    order_label.pack(pady=5)
+
 
 def show_info_screen(camera_frame):
     # Clear parent frame
@@ -279,46 +396,66 @@ def show_debug_screen(camera_frame):
     back_clear_btn = ctk.CTkButton(back_btn_frame, text="Clear", command=back_clear)
     back_clear_btn.grid(row=0, column=1, padx=5)
 
+    # Fuzzy match cache, OCR cascade, motion gate, YOLO batching and pipeline counters
+    cache_stats_label = ctk.CTkLabel(debug_main_frame, text="", font=("Arial", 14), text_color="white")
+    cache_stats_label.pack(pady=5)
+
     # ----------------------------------------------------------------------
     # 3) Periodic Update of Mini-Previews
     # ----------------------------------------------------------------------
-    def cv2_to_tk(frame_bgr, max_size=(160, 90)):
+    # Preview version each label shows, so unchanged previews are skipped
+    shown_preview_versions = {}
+
+    def preview_to_tk(orientation):
         """
-        Convert a BGR NumPy frame (OpenCV) to a small TKinter image.
+        Wrap the camera's small RGB preview (published by detection) for
+        TKinter, or return None if it has not changed since the last call.
         """
-        if frame_bgr is None:
+        preview = detection.previews.get(orientation)
+        if preview is None:
             return None
-        # Convert BGR to RGB
-        frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-        pil_img = Image.fromarray(frame_rgb)
-        pil_img.thumbnail(max_size)
-        return ImageTk.PhotoImage(pil_img)
+        with preview.latest() as (version, frame_rgb):
+            if frame_rgb is None or shown_preview_versions.get(orientation) == version:
+                return None
+            shown_preview_versions[orientation] = version
+            return ImageTk.PhotoImage(Image.fromarray(frame_rgb))
 
     def update_camera_previews():
-        # front
-        if detection.front_debug_mode and detection.front_debug_image is not None:
-            # Show the debug image as the mini-preview
-            preview_img = cv2_to_tk(detection.front_debug_image)
-        else:
-            # Show the last real/detected frame
-            preview_img = cv2_to_tk(detection.front_last_frame)
-
-        nonlocal front_preview_tk
+        # Debug images go through detection too, so they show up here as well
+        nonlocal front_preview_tk, back_preview_tk
+        preview_img = preview_to_tk('front')
         if preview_img is not None:
             front_preview_tk = preview_img
             front_preview_label.configure(image=front_preview_tk, text="")
 
-        # back
-        if detection.back_debug_mode and detection.back_debug_image is not None:
-            preview_img = cv2_to_tk(detection.back_debug_image)
-        else:
-            preview_img = cv2_to_tk(detection.back_last_frame)
-
-        nonlocal back_preview_tk
+        preview_img = preview_to_tk('back')
         if preview_img is not None:
             back_preview_tk = preview_img
             back_preview_label.configure(image=back_preview_tk, text="")
 
+        stats = match_cache.stats()
+        yolo_stats = detection.inference_service.stats()
+        cache_stats_label.configure(
+            text=f"Match cache: {stats['hits']} hits / {stats['misses']} misses "
+                 f"({stats['hit_rate']:.0%}), {stats['size']} entries\n"
+                 f"OCR engine calls: {detection.ocr_engine_calls['run']} run, "
+                 f"{detection.ocr_engine_calls['saved']} saved by cascade\n"
+                 + ", ".join(f"YOLO skipped ({name}): {gate.skip_ratio():.0%}"
+                             for name, gate in detection.motion_gates.items())
+                 + f"\nYOLO batches: {yolo_stats['batches']}, avg size {yolo_stats['avg_batch_size']:.1f}, "
+                   f"avg latency {yolo_stats['avg_latency_ms']:.0f} ms"
+                 + "".join(f"\nPipeline {name}: latency p50 {stats['latency'].percentile(50) * 1000:.0f} ms, "
+                           f"p95 {stats['latency'].percentile(95) * 1000:.0f} ms, dropped "
+                           + ", ".join(f"{stage} {q.dropped}" for stage, q in stats['queues'].items())
+                           + f"; frame buffers {stats['frame_pool'].preallocated} preallocated, "
+                             f"{stats['frame_pool'].allocations / max(stats['queues']['detect'].put_count, 1):.2f} "
+                             f"allocations per frame"
+                           for name, stats in detection.pipeline_stats.items())
+                 + f"\nUI events: {ui_event_stats['events']} received, {ui_event_stats['coalesced']} coalesced, "
+                   f"queue depth {ui_event_stats['queue_depth']} (now {detection_queue.qsize()}), "
+                   f"lag p50 {ui_event_stats['lag'].percentile(50) * 1000:.0f} ms, "
+                   f"p95 {ui_event_stats['lag'].percentile(95) * 1000:.0f} ms")
+
         # Schedule the next update
         camera_frame.after(200, update_camera_previews)
 
@@ -369,47 +506,158 @@ def play_alert_sound(alert_message, camera_frame):
     camera_frame.after(5000, alert_label.destroy)
 
 
-def update_ui(camera_frame):
+# Seconds a police car stays on the map without being detected again
+DETECTION_TIMEOUT = 5.0
+
+# Events are normally handled when the UiWaker fires; this slow poll picks
+# up anything left in the queue should a wake-up get lost
+SAFETY_POLL_MS = 1000
+
+# Detection events handled by the UI, for the Debug screen: events received,
+# events merged into a newer position of the same plate, queue depth at the
+# last wake-up and the delay between an event arriving and the UI handling it
+ui_event_stats = {'events': 0, 'coalesced': 0, 'queue_depth': 0, 'lag': LatencyStats()}
+
+# Police car expiry: heap of (deadline, plate) and the pending timer
+expiry_heap = []
+expiry_timer = {'after_id': None, 'deadline': None}
+
+
+def start_ui_updates(camera_frame):
     """
-    Periodically checks the detection_queue for events 
-    (police_car or play_alert) and updates the map accordingly.
-    Also removes expired police cars from the map if not detected again.
+    Handle detection events as they arrive instead of polling for them.
     """
-    import time
-    from detection import detection_queue
-    from map_display import police_cars, place_or_move_police_car, road_canvas
-    DETECTION_TIMEOUT = 5.0  # seconds
+    root = camera_frame.winfo_toplevel()
+    waker = UiWaker(root)
+    root.bind(waker.event_name, lambda event: update_ui(camera_frame, waker), add='+')
+    detection.detection_listeners.append(waker.notify)
+    waker.start()
+    # Pick up anything queued before the listener was added
+    waker.notify()
+
+    def safety_poll():
+        if not detection_queue.empty():
+            update_ui(camera_frame, waker)
+        camera_frame.after(SAFETY_POLL_MS, safety_poll)
+
+    camera_frame.after(SAFETY_POLL_MS, safety_poll)
+
 
-    # Process new queue items
+def update_ui(camera_frame, waker):
+    """
+    Handle all queued detection events (police_car or play_alert) at once,
+    moving each police car only to its latest position.
+    """
+    from map_display import place_or_move_police_car
+
+    pending_since = waker.take()
+
+    latest_positions = {}
+    alerts = []
+    count = 0
     try:
         while True:
             item = detection_queue.get_nowait()
+            count += 1
             if item[0] == 'police_car':
                 # item = ('police_car', plate, depth, horiz_offset, orientation)
                 _, plate, distance, horizontal_offset, orientation = item
-                place_or_move_police_car(plate, distance, horizontal_offset, orientation)
+                latest_positions.pop(plate, None)
+                latest_positions[plate] = (distance, horizontal_offset, orientation)
 
             elif item[0] == 'play_alert':
                 alert_message = item[1]
-                play_alert_sound(alert_message, camera_frame)
+                if alert_message not in alerts:
+                    alerts.append(alert_message)
 
     except queue.Empty:
         pass
 
-    # Clean up old police cars
+    ui_event_stats['events'] += count
+    ui_event_stats['coalesced'] += count - len(latest_positions) - len(alerts)
+    ui_event_stats['queue_depth'] = count
+    if pending_since is not None:
+        ui_event_stats['lag'].add(time.perf_counter() - pending_since)
+
+    for plate, (distance, horizontal_offset, orientation) in latest_positions.items():
+        place_or_move_police_car(plate, distance, horizontal_offset, orientation)
+        schedule_expiry(plate, camera_frame)
+
+    for alert_message in alerts:
+        play_alert_sound(alert_message, camera_frame)
+
+
+def schedule_expiry(plate, camera_frame):
+    """
+    Make sure `plate` is removed from the map DETECTION_TIMEOUT after its
+    last detection. Each car has one heap entry, pushed back when it was
+    seen again in the meantime.
+    """
+    from map_display import police_cars
+
+    info = police_cars.get(plate)
+    if info is None or info.get('expiry_scheduled'):
+        return
+    info['expiry_scheduled'] = True
+    heapq.heappush(expiry_heap, (info['last_detection_time'] + DETECTION_TIMEOUT, plate))
+    arm_expiry_timer(camera_frame)
+
+
+def arm_expiry_timer(camera_frame):
+    if not expiry_heap:
+        return
+    deadline = expiry_heap[0][0]
+    if expiry_timer['after_id'] is not None:
+        if expiry_timer['deadline'] <= deadline:
+            return
+        camera_frame.after_cancel(expiry_timer['after_id'])
+    delay_ms = max(0, int((deadline - time.time()) * 1000))
+    expiry_timer['deadline'] = deadline
+    expiry_timer['after_id'] = camera_frame.after(delay_ms, expire_police_cars, camera_frame)
+
+
+def expire_police_cars(camera_frame):
+    """
+    Remove the police cars whose deadline passed without a new detection.
+    """
+    from map_display import police_cars, road_canvas
+
+    expiry_timer['after_id'] = None
     now = time.time()
-    to_remove = []
-    for plate, info in police_cars.items():
-        if now - info['last_detection_time'] >= DETECTION_TIMEOUT:
-            # remove from canvas
-            if road_canvas:
-                road_canvas.delete(info['canvas_id'])
-            to_remove.append(plate)
-    for plate in to_remove:
+    while expiry_heap and expiry_heap[0][0] <= now:
+        _, plate = heapq.heappop(expiry_heap)
+        info = police_cars.get(plate)
+        if info is None:
+            continue
+        deadline = info['last_detection_time'] + DETECTION_TIMEOUT
+        if deadline > now:
+            # Seen again since: check back at the new deadline
+            heapq.heappush(expiry_heap, (deadline, plate))
+            continue
+        # remove from canvas
+        if road_canvas:
+            road_canvas.delete(info['canvas_id'])
         del police_cars[plate]
+    arm_expiry_timer(camera_frame)
+
 
-    # schedule next check
-    camera_frame.after(100, update_ui, camera_frame)
+MODEL_STATUS_TEXT = {
+    'pending': "oczekuje",
+    'loading': "ładowanie…",
+    'ready': "gotowy",
+    'failed': "błąd"
+}
+
+
+def update_model_status(status_label):
+    """
+    Show per-model warm-up status; stops polling once nothing is loading.
+    """
+    status = detection.models.status()
+    status_label.configure(text="\n".join(
+        f"{name}: {MODEL_STATUS_TEXT[state]}" for name, (state, _) in status.items()))
+    if any(state in ('pending', 'loading') for state, _ in status.values()):
+        status_label.after(500, update_model_status, status_label)
 
 
 def create_app():
@@ -454,10 +702,16 @@ def create_app():
                               width=180, height=50)
     debug_btn.grid(row=4, padx=20, pady=20, sticky="ew")
 
+    # Warm-up status of the detection models, until all of them are loaded
+    model_status_label = ctk.CTkLabel(sidebar, text="", font=("Arial", 12),
+                                      text_color="white", justify="left")
+    model_status_label.grid(row=5, padx=20, pady=10, sticky="w")
+    update_model_status(model_status_label)
+
     # After the UI is loaded, we start with the "Mapa" view:
     app.after(1000, lambda: button_click("Mapa", camera_frame))
 
-    # Start periodic UI update checks
-    update_ui(camera_frame)
+    # Handle detection events as they arrive
+    start_ui_updates(camera_frame)
 
     return app
@@ -0,0 +1,72 @@
+# ui_events.py
+
+import threading
+import time
+import tkinter as tk
+
+
+class UiWaker:
+    """
+    Wakes the Tk main loop when detection events arrive.
+
+    Detection threads call `notify()`, which only sets a flag and never
+    waits on Tk. A small thread turns the first notification of each batch
+    into one `event_name` virtual event on `widget`; no further events are
+    generated until the UI handler calls `take()` to start draining.
+    If Tk refuses the event (e.g. its main loop has not started yet), it is
+    generated again after `retry_interval` seconds.
+    """
+
+    def __init__(self, widget, event_name: str = '<<DetectionEvent>>', retry_interval: float = 0.1):
+        self.widget = widget
+        self.event_name = event_name
+        self.retry_interval = retry_interval
+        self._cond = threading.Condition()
+        self._pending = False
+        self._fired = False
+        self._pending_since = None
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='ui-waker', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def notify(self):
+        with self._cond:
+            if not self._pending:
+                self._pending = True
+                self._pending_since = time.perf_counter()
+                self._cond.notify()
+
+    def take(self):
+        """
+        Mark the pending events as being handled. Returns when the first of
+        them was notified (perf_counter), or None if nothing was pending.
+        """
+        with self._cond:
+            pending_since = self._pending_since if self._pending else None
+            self._pending = False
+            self._fired = False
+            self._pending_since = None
+            return pending_since
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopped or (self._pending and not self._fired))
+                if self._stopped:
+                    return
+                self._fired = True
+            try:
+                self.widget.event_generate(self.event_name, when='tail')
+            except (tk.TclError, RuntimeError):
+                # "main thread is not in main loop", or the window is gone;
+                # keep the events pending and try again until stopped
+                with self._cond:
+                    self._fired = False
+                    self._cond.wait_for(lambda: self._stopped, self.retry_interval)
@@ -0,0 +1,108 @@
+# virtual_list.py
+
+import tkinter as tk
+import tkinter.font as tkfont
+
+
+class VirtualList(tk.Frame):
+    """
+    Scrollable single-selection list that only creates canvas items for the
+    rows in view, so showing a 100k-plate database costs the same as
+    showing twenty plates.
+
+    `set_items` takes any sequence (it is not copied). `curselection()` and
+    `get()` work like their tk.Listbox counterparts.
+    """
+
+    def __init__(self, master, font=("Arial", 14), bg="#121212", fg="white",
+                 selectbackground="#333333", selectforeground="white", **kwargs):
+        super().__init__(master, bg=bg, **kwargs)
+        self.font = font
+        self.fg = fg
+        self.selectbackground = selectbackground
+        self.selectforeground = selectforeground
+        self.row_height = tkfont.Font(font=font).metrics('linespace') + 4
+
+        self.items = []
+        self.selection = None
+        self.first_row = 0
+        # Reused canvas items: (background rectangle, text) per visible row
+        self._rows = []
+
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0)
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.canvas.bind('<Configure>', lambda event: self._render())
+        self.canvas.bind('<Button-1>', self._on_click)
+        self.canvas.bind('<MouseWheel>', lambda event: self.yview('scroll', -event.delta // 120, 'units'))
+        self.canvas.bind('<Button-4>', lambda event: self.yview('scroll', -1, 'units'))
+        self.canvas.bind('<Button-5>', lambda event: self.yview('scroll', 1, 'units'))
+
+    def set_items(self, items):
+        self.items = items
+        self.selection = None
+        self.first_row = max(0, min(self.first_row, len(items) - self._visible_rows()))
+        self._render()
+
+    def curselection(self):
+        return (self.selection,) if self.selection is not None else ()
+
+    def get(self, index):
+        return self.items[index]
+
+    def _visible_rows(self) -> int:
+        return max(1, self.canvas.winfo_height() // self.row_height)
+
+    def yview(self, *args):
+        visible = self._visible_rows()
+        last_first = max(0, len(self.items) - visible)
+        if args and args[0] == 'moveto':
+            first = int(float(args[1]) * len(self.items))
+        elif args and args[0] == 'scroll':
+            step = visible if args[2] == 'pages' else 1
+            first = self.first_row + int(args[1]) * step
+        else:
+            return
+        self.first_row = max(0, min(first, last_first))
+        self._render()
+
+    def _on_click(self, event):
+        row = self.first_row + event.y // self.row_height
+        if row < len(self.items):
+            self.selection = row
+            self._render()
+
+    def _render(self):
+        visible = self._visible_rows()
+        # One extra row covers the partly visible one at the bottom
+        needed = min(visible + 1, len(self.items) - self.first_row)
+        width = self.canvas.winfo_width()
+
+        while len(self._rows) < needed:
+            n = len(self._rows)
+            background = self.canvas.create_rectangle(0, n * self.row_height, width,
+                                                      (n + 1) * self.row_height, outline="")
+            text = self.canvas.create_text(6, n * self.row_height + self.row_height // 2,
+                                           anchor="w", font=self.font)
+            self._rows.append((background, text))
+
+        for n, (background, text) in enumerate(self._rows):
+            row = self.first_row + n
+            if n >= needed:
+                self.canvas.itemconfigure(background, state="hidden")
+                self.canvas.itemconfigure(text, state="hidden")
+                continue
+            selected = row == self.selection
+            self.canvas.coords(background, 0, n * self.row_height, width, (n + 1) * self.row_height)
+            self.canvas.itemconfigure(background, state="normal",
+                                      fill=self.selectbackground if selected else "")
+            self.canvas.itemconfigure(text, state="normal", text=self.items[row],
+                                      fill=self.selectforeground if selected else self.fg)
+
+        if self.items:
+            self.scrollbar.set(self.first_row / len(self.items),
+                               min(1.0, (self.first_row + visible) / len(self.items)))
+        else:
+            self.scrollbar.set(0.0, 1.0)